@@ -0,0 +1,155 @@
+"""
+background_cache.py
+Cache de l'image de fond mise à l'échelle pour la vue de rendu de composition_editor.py.
+
+L'image de fond (souvent en 4K) n'est redimensionnée qu'une fois par taille d'affichage ;
+l'image obtenue sert de base au compositeur d'un redraw à l'autre. Pendant une interaction
+(drag, redimensionnement de la fenêtre) on se contente d'un rééchantillonnage rapide, et la
+passe LANCZOS est faite plus tard, une fois l'utilisateur inactif.
+
+Au chargement, une pyramide (1/2, 1/4, 1/8...) est construite dans un thread : chaque
+redimensionnement part du plus petit niveau encore plus grand que la cible, si bien qu'un
+redimensionnement de fenêtre ne relit plus jamais les 8 Mpx de l'original.
+
+Quand la vue est zoomée, region() ne produit que la partie visible de l'image.
+"""
+
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+
+FAST = 'fast'
+FINAL = 'final'
+
+# rééchantillonnage rapide (plus proche voisin : ~100x moins cher que LANCZOS sur un fond 4K)
+FAST_RESAMPLE = Image.NEAREST
+FINAL_RESAMPLE = Image.LANCZOS
+
+MAX_CACHED_PIXELS = 3840 * 2160  # au-delà (vue très zoomée), seule la partie visible est rééchantillonnée
+MIN_LEVEL_SIZE = 64  # on arrête la pyramide quand le petit côté passerait sous cette taille
+
+
+def build_pyramid(image, min_size=MIN_LEVEL_SIZE):
+    """[image, image/2, image/4, ...] (réduction 2x2 moyennée par Image.reduce)."""
+    levels = [image]
+    while min(levels[-1].size) // 2 >= min_size:
+        levels.append(levels[-1].reduce(2))
+    return levels
+
+
+class BackgroundCache:
+    """Versions redimensionnées de l'image de fond, indexées par taille cible (w, h)."""
+
+    def __init__(self, image=None, maxsize=4):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # (w, h) -> [Image, qualité]
+        self._levels = []
+        self._region = None  # (clé, Image) de la dernière région hors cache
+        self._generation = 0
+        self._thread = None
+        self.hits = 0
+        self.misses = 0
+        self.set_image(image)
+
+    def set_image(self, image):
+        """Change l'image source ; les tailles en cache sont invalidées et la pyramide reconstruite."""
+        self.image = image
+        self._entries.clear()
+        self._region = None
+        self._generation += 1
+        self._levels = [image] if image is not None else []
+        if image is not None:
+            self._thread = threading.Thread(target=self._build_levels, args=(self._generation, image),
+                                            daemon=True)
+            self._thread.start()
+
+    def _build_levels(self, generation, image):
+        levels = build_pyramid(image)
+        # ignore le résultat si une autre image a été chargée entre-temps
+        if generation == self._generation:
+            self._levels = levels
+
+    def pyramid_ready(self, timeout=None):
+        """True quand la pyramide est construite (attend au plus `timeout` secondes ; 0 = sans attendre)."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return len(self._levels) > 1 or (self._thread is not None and not self._thread.is_alive())
+
+    def level_for(self, size):
+        """Plus petit niveau de la pyramide couvrant `size` (l'original tant qu'elle n'est pas prête)."""
+        levels = self._levels
+        for level in reversed(levels):
+            if level.size[0] >= size[0] and level.size[1] >= size[1]:
+                return level
+        return levels[0]
+
+    def clear(self):
+        self._entries.clear()
+        self._region = None
+
+    def _resample(self, size, quality):
+        source = self.level_for(size)
+        if source.size == size:
+            return source
+        return source.resize(size, FAST_RESAMPLE if quality == FAST else FINAL_RESAMPLE)
+
+    def scaled(self, size, fast=False):
+        """Image de fond à la taille `size`.
+
+        fast=True accepte une version rapide (ou n'importe quelle version déjà en cache) ;
+        fast=False garantit la version LANCZOS.
+        """
+        size = (max(1, int(size[0])), max(1, int(size[1])))
+        entry = self._entries.get(size)
+        if entry is not None:
+            self._entries.move_to_end(size)
+            if fast or entry[1] == FINAL:
+                self.hits += 1
+                return entry[0]
+            entry[0] = self._resample(size, FINAL)
+            entry[1] = FINAL
+            return entry[0]
+
+        self.misses += 1
+        quality = FAST if fast else FINAL
+        image = self._resample(size, quality)
+        self._entries[size] = [image, quality]
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return image
+
+    def is_final(self, size):
+        """True si la version LANCZOS de cette taille est déjà en cache."""
+        entry = self._entries.get((max(1, int(size[0])), max(1, int(size[1]))))
+        return entry is not None and entry[1] == FINAL
+
+    def region(self, size, box, fast=False):
+        """Partie `box` (x0, y0, x1, y1, en pixels de l'image mise à l'échelle `size`).
+
+        Retourne (image, finale) ; finale est False si un rééchantillonnage rapide a été utilisé.
+        """
+        size = (max(1, int(size[0])), max(1, int(size[1])))
+        box = tuple(int(v) for v in box)
+        if size[0] * size[1] <= MAX_CACHED_PIXELS:
+            image = self.scaled(size, fast)
+            final = self.is_final(size)
+            if box == (0, 0) + size:
+                return image, final
+            return image.crop(box), final
+
+        # vue très zoomée : on rééchantillonne directement la zone visible depuis la pyramide
+        key = (size, box, FAST if fast else FINAL)
+        if self._region is not None and self._region[0][:2] == key[:2] and (fast or self._region[0][2] == FINAL):
+            self.hits += 1
+            return self._region[1], self._region[0][2] == FINAL
+        self.misses += 1
+        source = self.level_for(size)
+        fx = source.size[0] / size[0]
+        fy = source.size[1] / size[1]
+        src_box = (box[0] * fx, box[1] * fy, box[2] * fx, box[3] * fy)
+        image = source.resize((box[2] - box[0], box[3] - box[1]),
+                              FAST_RESAMPLE if fast else FINAL_RESAMPLE, box=src_box)
+        self._region = (key, image)
+        return image, not fast
@@ -0,0 +1,101 @@
+"""
+bench_keyframe_memory.py
+Mesure la mémoire occupée par keyframe, modèle et moteur d'évaluation compris :
+- avant : une instance à __dict__ par keyframe (couleur en chaîne), plus la copie en
+  colonnes que le moteur compilait à partir de ces objets ;
+- après : les colonnes NumPy de KeyframeList (document_model.py) sont le stockage
+  principal, lu tel quel par le moteur ; seuls s'y ajoutent ses tableaux concaténés.
+
+Usage:
+    python bench_keyframe_memory.py [nombre_de_keyframes]
+"""
+
+import sys
+import random
+import tracemalloc
+
+import numpy as np
+
+from document_model import Layer, KeyframeList
+from keyframe_engine import KeyframeEngine, pack_color
+
+
+class DictKeyframe:
+    """Réplique de l'ancienne Keyframe (attributs dans un __dict__, couleur en chaîne)."""
+    def __init__(self, time, x, y, w, h, color, opacity, rotation=0, shape_type="rectangle"):
+        self.time = time
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.color = color
+        self.opacity = opacity
+        self.rotation = rotation
+        self.shape_type = shape_type
+
+
+def random_args(n):
+    rnd = random.Random(0)
+    return [(i * 0.04, rnd.random(), rnd.random(), rnd.random(), rnd.random(),
+             "#%02x%02x%02x" % (rnd.randint(0, 255), rnd.randint(0, 255), rnd.randint(0, 255)),
+             rnd.randint(0, 100), rnd.uniform(-180, 180))
+            for i in range(n)]
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    obj = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return obj, size
+
+
+def build_list(args):
+    """KeyframeList remplie colonne par colonne (sans passer par des vues Keyframe)."""
+    kfs = KeyframeList()
+    time, x, y, w, h, color, opacity, rotation = zip(*args)
+    kfs.times = np.array(time, dtype=np.float64)
+    kfs.x = np.array(x, dtype=np.float64)
+    kfs.y = np.array(y, dtype=np.float64)
+    kfs.w = np.array(w, dtype=np.float64)
+    kfs.h = np.array(h, dtype=np.float64)
+    kfs.rgb = np.array([pack_color(c) for c in color], dtype=np.uint32)
+    kfs.opacity = np.array(opacity, dtype=np.float64)
+    kfs.rotation = np.array(rotation, dtype=np.float64)
+    kfs.shape = np.zeros(len(time), dtype=np.int8)
+    return kfs
+
+
+def build_engine(keyframes):
+    engine = KeyframeEngine()
+    engine.sync([Layer("bench")], [keyframes])
+    engine._pack()
+    return engine
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    # les arguments sont générés dans la mesure : chaque keyframe possède ses propres floats
+    _, dict_bytes = measure(lambda: [DictKeyframe(*a) for a in random_args(n)])
+    # en colonnes, les valeurs sont recopiées : les arguments ne sont pas gardés
+    args = random_args(n)
+    kfs, list_bytes = measure(lambda: build_list(args))
+    del args
+    _, engine_bytes = measure(lambda: build_engine(kfs))
+
+    # avant, le moteur compilait une piste en colonnes (même taille que KeyframeList) depuis les objets
+    before = dict_bytes + list_bytes + engine_bytes
+    after = list_bytes + engine_bytes
+    print(f"{n} keyframes (octets / keyframe, modèle + moteur)")
+    print(f"  objets Keyframe (__dict__)  : {dict_bytes / n:7.1f}")
+    print(f"  colonnes (KeyframeList)     : {list_bytes / n:7.1f}")
+    print(f"  tableaux concaténés moteur  : {engine_bytes / n:7.1f}")
+    print(f"  avant  : objets + piste du moteur + tableaux : {before / n:7.1f}")
+    print(f"  après  : colonnes + tableaux                 : {after / n:7.1f}")
+
+
+if __name__ == "__main__":
+    main()
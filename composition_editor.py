@@ -16,11 +16,26 @@ import bisect
 import tkinter as tk
 from tkinter import filedialog, colorchooser, messagebox
 import customtkinter as ctk
-from PIL import Image, ImageTk, ImageDraw
+from PIL import Image
 import numpy as np
 import time
 import threading
 
+import document_model
+from document_model import DocumentModel, Layer, Keyframe
+from background_cache import BackgroundCache
+from compositor import Compositor, styles_from_states, styles_from_values, MAX_SPRITE_PIXELS
+from geometry import LayerGeometry, CORNER_NAMES
+from redraw_scheduler import RedrawScheduler
+from render_scene import RenderScene
+from timeline_scene import TimelineScene
+from keyframe_selection import KeyframeSelection
+from waveform_peaks import PeakPyramid, load_peak_cache, save_peak_cache
+from timeline_scale import TimelineScale, MIN_SECONDS as TIMELINE_MIN_SECONDS, WHEEL_STEP as TIMELINE_WHEEL_STEP
+from viewport import Viewport, WHEEL_STEP
+from perf_monitor import PERF, timed
+from keyframe_engine import KeyframeEngine, PlaybackCursor, LayerStateCache, state_from_values, EASINGS
+
 # Librosa for optimized audio loading
 try:
     import librosa
@@ -44,10 +59,32 @@ except Exception:
 
 
 # --- Animation mode: True = interpolation, False = téléportation ---
+# (mode par défaut des keyframes dont l'easing n'est pas défini)
 animate = False
 
 WINDOW_SIZE = (1200, 800)
 
+# délai d'inactivité (ms) avant de remplacer le fond rééchantillonné rapidement par sa version LANCZOS
+BG_REFINE_DELAY_MS = 150
+# période de mise à jour de l'affichage des mesures de performance (ms)
+PERF_HUD_INTERVAL_MS = 500
+# la timeline ne dessine que la partie visible plus une marge de chaque côté :
+# TIMELINE_MARGIN x la largeur visible, au moins TIMELINE_MIN_MARGIN_PX
+TIMELINE_MARGIN = 0.5
+TIMELINE_MIN_MARGIN_PX = 200
+# « ajuster à la sélection » montre au moins cette durée (s)
+TIMELINE_MIN_FIT_SECONDS = 2.0
+# disposition des pistes de la timeline : piste des scènes puis une piste par layer
+TIMELINE_TRACKS_TOP = 30
+TIMELINE_TRACK_H = 28
+TIMELINE_TRACK_PADDING = 8
+# tolérance (pixels) des clics et du survol sur les keyframes
+TIMELINE_HIT_PX = 10
+# pendant un drag sur le rendu, le panneau de propriétés n'est rafraîchi qu'à cette période (ms)
+PROPERTIES_THROTTLE_MS = 100
+# l'export d'images évalue les layers par blocs de ce nombre d'instants (mémoire bornée)
+EXPORT_EVAL_CHUNK = 256
+
 actual_color_theme = "light"
 
 ctk.set_appearance_mode(actual_color_theme)  # Modes: "system" (standard), "dark", "light"
@@ -58,43 +95,6 @@ ctk.set_default_color_theme("blue")  # Themes: "blue" (standard), "green", "dark
 
 
 
-class Layer:
-    def __init__(self, name, x_rel=0.1, y_rel=0.1, w_rel=0.2, h_rel=0.2, color="#ff0000", opacity=100, rotation=0, shape_type="rectangle"):
-        """
-        Coordinates relative to background image: values between 0 and 1.
-        """
-        self.name = name
-        self.x = x_rel
-        self.y = y_rel
-        self.w = w_rel
-        self.h = h_rel
-        self.color = color
-        self.opacity = opacity  # 0..100
-        self.rotation = rotation  # in degrees
-        self.shape_type = shape_type
-
-
-
-
-class Keyframe:
-    def __init__(self, time, x, y, w, h, color, opacity, rotation=0, shape_type="rectangle"):
-        self.time = time
-        self.x = x
-        self.y = y
-        self.w = w
-        self.h = h
-        self.color = color
-        self.opacity = opacity
-        self.rotation = rotation
-        self.shape_type = shape_type
-
-
-
-
-
-
-
-
 class export_Window(ctk.CTkToplevel):
     """Fenêtre de dialogue qui s'ouvre lors de l'action Ctrl+S."""
     def __init__(self, master=None):
@@ -154,7 +154,7 @@ class CompositionApp:
         self.layers = []
         self.keyframes = []  # Liste de liste : une liste de keyframes par layer
         self.selected_index = None
-        self.selected_keyframes = set()  # Set des tuples (layer_idx, kf_idx) sélectionnés
+        self.selected_keyframes = KeyframeSelection()  # plages d'index de keyframes par layer
         
         self.scene_keyframes = []  # Liste des keyframes de scène
 
@@ -189,82 +189,68 @@ class CompositionApp:
         self.render_canvas.bind('<Button-1>', self._on_render_mouse_down)
         self.render_canvas.bind('<B1-Motion>', self._on_render_mouse_drag)
         self.render_canvas.bind('<ButtonRelease-1>', self._on_render_mouse_up)
+        # zoom à la molette (Windows/macOS : MouseWheel, X11 : boutons 4/5), pan avec espace + glisser
+        self.render_canvas.bind('<MouseWheel>', lambda e: self._on_render_wheel(e, 1 if e.delta > 0 else -1))
+        self.render_canvas.bind('<Button-4>', lambda e: self._on_render_wheel(e, 1))
+        self.render_canvas.bind('<Button-5>', lambda e: self._on_render_wheel(e, -1))
+        self.root.bind('<KeyPress-space>', self._on_space_press, add='+')
+        self.root.bind('<KeyRelease-space>', self._on_space_release, add='+')
+
+    # --- Zoom / pan de la vue de rendu ---
+    def _on_render_wheel(self, event, direction):
+        if not self.bg_image:
+            return
+        cw = max(1, self.render_canvas.winfo_width())
+        ch = max(1, self.render_canvas.winfo_height())
+        factor = WHEEL_STEP if direction > 0 else 1 / WHEEL_STEP
+        self.viewport.zoom_at(factor, event.x, event.y, cw, ch, *self.bg_orig_size)
+        self._view_change_time = time.monotonic()
+        self.redraw_scheduler.request('render')
+
+    def _on_space_press(self, event):
+        self._space_down = True
+
+    def _on_space_release(self, event):
+        self._space_down = False
+
+    def reset_view(self):
+        """Revient à l'image de fond entière (zoom 1, centrée)."""
+        self.viewport.reset()
+        self._view_change_time = time.monotonic()
+        self.redraw_scheduler.request('render')
+
+    def zoom_view(self, factor):
+        cw = max(1, self.render_canvas.winfo_width())
+        ch = max(1, self.render_canvas.winfo_height())
+        self.viewport.zoom_at(factor, cw / 2, ch / 2, cw, ch, *self.bg_orig_size)
+        self._view_change_time = time.monotonic()
+        self.redraw_scheduler.request('render')
 
     def _get_handle_under_mouse(self, x, y):
         idx = self.selected_index
-        if idx is None:
+        geom = self._frame_geometry()
+        if idx is None or idx >= len(geom):
             return None, None
-        bx, by, draw_w, draw_h, _ = self._render_geometry()
-        state = self._compute_layer_state_at_time(idx, self.get_playback_time())
-        w = state['w'] * draw_w
-        h = state['h'] * draw_h
-        angle = state.get('rotation', 0)
-        cx = bx + state['x'] * draw_w + w/2
-        cy = by + state['y'] * draw_h + h/2
-        from math import cos, sin, radians, hypot
-        rot = radians(angle)
-        cos_a = cos(rot)
-        sin_a = sin(rot)
         # Corners
-        corners = [
-            ('nw', (-w/2, -h/2)),
-            ('ne', (w/2, -h/2)),
-            ('se', (w/2, h/2)),
-            ('sw', (-w/2, h/2))
-        ]
         handle_size = 12
-        for name, (px, py) in corners:
-            rx = px * cos_a - py * sin_a + cx
-            ry = px * sin_a + py * cos_a + cy
-            if abs(x - rx) <= handle_size and abs(y - ry) <= handle_size:
-                return 'resize', name
+        near = np.all(np.abs(geom.corners[idx] - (x, y)) <= handle_size, axis=1)
+        if near.any():
+            return 'resize', CORNER_NAMES[int(np.argmax(near))]
         # Rotation handle
-        rot_px, rot_py = 0, -h/2 - 30
-        rot_x = rot_px * cos_a - rot_py * sin_a + cx
-        rot_y = rot_px * sin_a + rot_py * cos_a + cy
-        if hypot(x - rot_x, y - rot_y) <= 16:
+        rot_x, rot_y = geom.rotate_handles[idx]
+        if math.hypot(x - rot_x, y - rot_y) <= 16:
             return 'rotate', None
         return None, None
 
     def _on_render_mouse_down(self, event):
+        if self._space_down:
+            # espace enfoncé : glisser déplace la vue
+            self._pan_start = (event.x, event.y)
+            return
         # Sélectionne d'abord la forme cliquée (même si une autre est sélectionnée)
         x, y = event.x, event.y
         bx, by, draw_w, draw_h, scale = self._render_geometry()
-        found = None
-        for idx in range(len(self.layers)-1, -1, -1):
-            # Utiliser l'état direct si pas en lecture, sinon keyframe/interpolé
-            if not self.is_playing and idx == self.selected_index:
-                L = self.layers[idx]
-                state = {
-                    'x': L.x, 'y': L.y, 'w': L.w, 'h': L.h,
-                    'color': L.color, 'opacity': L.opacity,
-                    'rotation': getattr(L, 'rotation', 0)
-                }
-            else:
-                state = self._compute_layer_state_at_time(idx, self.get_playback_time())
-            w = state['w'] * draw_w
-            h = state['h'] * draw_h
-            angle = state.get('rotation', 0)
-            cx = bx + state['x'] * draw_w + w/2
-            cy = by + state['y'] * draw_h + h/2
-            from math import cos, sin, radians
-            rot = radians(angle)
-            cos_a = cos(rot)
-            sin_a = sin(rot)
-            points = [
-                (-w/2, -h/2),
-                (w/2, -h/2),
-                (w/2, h/2),
-                (-w/2, h/2)
-            ]
-            abs_points = []
-            for px, py in points:
-                rx = px * cos_a - py * sin_a + cx
-                ry = px * sin_a + py * cos_a + cy
-                abs_points.append((rx, ry))
-            if self._point_in_polygon(x, y, abs_points):
-                found = idx
-                break
+        found = self._layer_at(x, y)
         if found is not None:
             self.select_layer(found)
             idx = found
@@ -280,7 +266,6 @@ class CompositionApp:
             self._drag_layer_idx = idx
             L = self.layers[idx]
             self._drag_orig = (L.x, L.y, L.w, L.h)
-            return
         elif mode == 'rotate':
             self._drag_mode = 'rotate'
             self._drag_start = (x, y)
@@ -290,32 +275,84 @@ class CompositionApp:
             w = L.w * draw_w
             h = L.h * draw_h
             self._drag_center = (bx + L.x * draw_w + w/2, by + L.y * draw_h + h/2)
-            self._drag_orig_angle = getattr(L, 'rotation', 0)
+            self._drag_orig_angle = L.rotation
+        # Sinon, test forme (drag move) : la forme cliquée est celle trouvée ci-dessus
+        elif found is not None:
+            self._drag_mode = 'move'
+            self._drag_start = (x, y)
+            self._drag_layer_idx = idx
+            L = self.layers[idx]
+            self._drag_orig = (L.x, L.y)
+        if self._drag_mode is not None:
+            self._begin_drag_preview()
+
+    # --- Chemin rapide du drag : seul le layer manipulé est redessiné ---
+    def _begin_drag_preview(self):
+        """Active le chemin rapide : fond + layers du dessous figés en une image, layers du
+        dessus en une autre ; chaque mouvement ne replace que le sprite du layer manipulé."""
+        if self.is_playing or not self.bg_image:
             return
-        # Sinon, test forme (drag move)
-        c = self.render_canvas
-        items = c.find_overlapping(x-2, y-2, x+2, y+2)
-        for item in items:
-            tags = c.gettags(item)
-            if f"layer_{idx}" in tags:
-                self._drag_mode = 'move'
-                self._drag_start = (x, y)
-                self._drag_layer_idx = idx
-                L = self.layers[idx]
-                self._drag_orig = (L.x, L.y)
-                return
+        self._drag_preview = {'idx': self._drag_layer_idx}
+        self.redraw_scheduler.request('render')
+
+    def _end_drag_preview(self):
+        if self._drag_preview is None:
+            return
+        self._drag_preview = None
+        self.render_scene.end_drag()
+
+    def _render_drag_preview(self, states, geom, background, visible):
+        """Compose les images figées du drag (appelée par redraw_render pendant un drag)."""
+        idx = self._drag_preview['idx']
+        vx0, vy0, vx1, vy1 = visible
+        rgb, opacity = styles_from_states(states)
+        below = self.compositor.render(background, geom, rgb, opacity, origin=(vx0, vy0), ids=list(range(idx)))
+        self.render_scene.set_frame(below, vx0, vy0)
+        above = self.compositor.render_rgba((vx1 - vx0, vy1 - vy0), geom, rgb, opacity, origin=(vx0, vy0),
+                                            ids=list(range(idx + 1, len(states))))
+        self.render_scene.set_overlay(above, vx0, vy0)
+        self._redraw_drag_layer()
+
+    @timed('redraw_drag_layer')
+    def _redraw_drag_layer(self):
+        """Replace le sprite du layer manipulé et ses poignées (rien d'autre n'est recomposé)."""
+        if self._drag_preview is None:
+            return
+        idx = self._drag_preview['idx']
+        L = self.layers[idx]
+        bx, by, draw_w, draw_h, _ = self._render_geometry()
+        geom = LayerGeometry([L.x], [L.y], [L.w], [L.h], [L.rotation], [L.shape_type == 'circle'],
+                             bx, by, draw_w, draw_h)
+        key = self.compositor.sprite_key(L.shape_type, geom.w[0], geom.h[0], L.rgb, L.opacity, L.rotation)
+        if key[1] * key[2] > MAX_SPRITE_PIXELS:
+            # sprite trop grand (vue très zoomée) : retour au rendu complet
+            self._end_drag_preview()
+            self.redraw_scheduler.request('render')
+            return
+        sprite = self.compositor.sprite(key)
+        sh, sw = sprite.alpha.shape[:2]
+        self.render_scene.set_sprite(key, lambda: self.compositor.sprite_image(sprite),
+                                     int(round(geom.cx[0] - sw / 2.0)), int(round(geom.cy[0] - sh / 2.0)))
+        self._draw_layer_handles(0, geom)
+        self.render_scene.finish()
 
     def _on_render_mouse_drag(self, event):
+        if self._pan_start is not None:
+            x0, y0 = self._pan_start
+            self.viewport.pan_by(event.x - x0, event.y - y0)
+            self._pan_start = (event.x, event.y)
+            self._view_change_time = time.monotonic()
+            self.redraw_scheduler.request('render')
+            return
         if self._drag_mode == 'move' and self._drag_layer_idx is not None:
             idx = self._drag_layer_idx
             L = self.layers[idx]
             bx, by, draw_w, draw_h, _ = self._render_geometry()
             dx = (event.x - self._drag_start[0]) / draw_w
             dy = (event.y - self._drag_start[1]) / draw_h
-            L.x = min(max(self._drag_orig[0] + dx, 0), 1-L.w)
-            L.y = min(max(self._drag_orig[1] + dy, 0), 1-L.h)
-            self.update_properties_panel()
-            self.redraw_render()
+            self.doc.update_layer(idx, x=min(max(self._drag_orig[0] + dx, 0), 1-L.w),
+                                  y=min(max(self._drag_orig[1] + dy, 0), 1-L.h))
+            self.redraw_scheduler.request_throttled('properties', PROPERTIES_THROTTLE_MS)
         elif self._drag_mode == 'resize' and self._drag_layer_idx is not None:
             idx = self._drag_layer_idx
             L = self.layers[idx]
@@ -346,12 +383,12 @@ class CompositionApp:
                 new_h = h0 + dy
             # Contraintes min/max
             min_size = 0.01
-            L.x = min(max(new_x, 0), 1-min_size)
-            L.y = min(max(new_y, 0), 1-min_size)
-            L.w = max(min(new_w, 1-L.x), min_size)
-            L.h = max(min(new_h, 1-L.y), min_size)
-            self.update_properties_panel()
-            self.redraw_render()
+            new_x = min(max(new_x, 0), 1-min_size)
+            new_y = min(max(new_y, 0), 1-min_size)
+            self.doc.update_layer(idx, x=new_x, y=new_y,
+                                  w=max(min(new_w, 1-new_x), min_size),
+                                  h=max(min(new_h, 1-new_y), min_size))
+            self.redraw_scheduler.request_throttled('properties', PROPERTIES_THROTTLE_MS)
         elif self._drag_mode == 'rotate' and self._drag_layer_idx is not None:
             idx = self._drag_layer_idx
             L = self.layers[idx]
@@ -362,11 +399,15 @@ class CompositionApp:
             a0 = atan2(y0 - cy, x0 - cx)
             a1 = atan2(event.y - cy, event.x - cx)
             delta = degrees(a1 - a0)
-            L.rotation = angle0 + delta
-            self.update_properties_panel()
-            self.redraw_render()
+            self.doc.update_layer(idx, rotation=angle0 + delta)
+            self.redraw_scheduler.request_throttled('properties', PROPERTIES_THROTTLE_MS)
 
     def _on_render_mouse_up(self, event):
+        self._pan_start = None
+        if self._drag_mode is not None:
+            # fin du drag : rendu complet et panneau de propriétés à jour
+            self._end_drag_preview()
+            self.redraw_scheduler.request('render', 'properties')
         self._drag_mode = None
         self._drag_layer_idx = None
         self._drag_start = None
@@ -375,56 +416,22 @@ class CompositionApp:
         self._drag_center = None
         self._drag_orig_angle = None
     # --- Gestion des poignées de manipulation sur le rendu ---
-    def _draw_layer_handles(self, idx, state, bx, by, draw_w, draw_h):
-        """Dessine les poignées de redimensionnement et de rotation pour le layer sélectionné."""
-        if idx != self.selected_index:
-            return
-        c = self.render_canvas
-        x = bx + state['x'] * draw_w
-        y = by + state['y'] * draw_h
-        w = state['w'] * draw_w
-        h = state['h'] * draw_h
-        angle = state.get('rotation', 0)
-        cx = x + w/2
-        cy = y + h/2
-        from math import cos, sin, radians
-        rot = radians(angle)
-        cos_a = cos(rot)
-        sin_a = sin(rot)
-        # Coins pour les poignées
-        corners = [
-            (-w/2, -h/2),  # nw
-            (w/2, -h/2),   # ne
-            (w/2, h/2),    # se
-            (-w/2, h/2)    # sw
-        ]
-        handle_size = 8
-        for i, (px, py) in enumerate(corners):
-            rx = px * cos_a - py * sin_a + cx
-            ry = px * sin_a + py * cos_a + cy
-            c.create_rectangle(
-                rx-handle_size, ry-handle_size, rx+handle_size, ry+handle_size,
-                fill="#FF5555", outline="#1F6AA5", width=1, tags="handle_corner"
-            )
-        # Poignée de rotation (au-dessus du centre haut)
-        rot_px, rot_py = 0, -h/2 - 30
-        rot_x = rot_px * cos_a - rot_py * sin_a + cx
-        rot_y = rot_px * sin_a + rot_py * cos_a + cy
-        c.create_oval(
-            rot_x-6, rot_y-6, rot_x+6, rot_y+6,
-            fill="#00FF00", outline="#1F6AA5", width=2, tags="handle_rotate"
-        )
+    def _draw_layer_handles(self, idx, geom):
+        """Place la bordure de sélection et les poignées (redimensionnement, rotation) du layer sélectionné."""
+        self.render_scene.set_selection(geom.outline(idx), geom.corners[idx].tolist(),
+                                        geom.rotate_handles[idx].tolist())
     def __init__(self, root):
         self.root = root
         self.root.title("Composition Editor - Proof of Concept")
         self.root.geometry(f"{WINDOW_SIZE[0]}x{WINDOW_SIZE[1]}")
         self.root.iconbitmap(False, 'icone.png')  # You can set a custom icon here if desired
 
-        # store layers
-        self.layers = []
+        # document (layers, keyframes, scènes, audio) ; les vues sont notifiées de ses changements
+        self.doc = DocumentModel()
+        self.doc.subscribe(self._on_document_changed)
         self.selected_index = None
         # selection state (ensure attributes exist for older code paths)
-        self.selected_keyframes = set()
+        self.selected_keyframes = KeyframeSelection()
         self.last_selected_type = None
         self.last_selected_object = None
 
@@ -438,26 +445,49 @@ class CompositionApp:
             'dragging': False,
             'start_x': 0,
             'start_time': 0.0,
-            'selected': set()
+            'layers': []
         }
+        # sélection par rectangle en cours dans la timeline (voir _update_marquee)
+        self._marquee = None
 
         # background image (PIL)
         self.bg_image = None
         self.bg_orig_size = (1, 1)  # real image origin size
-        self.bg_tk = None
-
-        # audio data
-        self.audio_waveform = None
-        self.audio_duration = 0.0
-        self.audio_filename = None
-
-        # keyframes
-        self.keyframes = [[] for _ in range(len(self.layers))]  # keyframes par layer
-
-        # scene keyframes (timeline markers for scene changes)
-        self.scene_keyframes = []
-        # scene names: dictionary mapping scene number to its name
-        self.scene_names = {}
+        # fond pré-mis à l'échelle, par taille d'affichage (rapide pendant les interactions)
+        self.bg_cache = BackgroundCache()
+        self._bg_refine_job = None
+        self._view_change_time = 0.0
+        # zoom / pan de la vue de rendu
+        self.viewport = Viewport()
+        self._space_down = False
+        self._pan_start = None
+        # chemin rapide du drag (voir _begin_drag_preview)
+        self._drag_preview = None
+        # compositeur partagé par l'aperçu et l'export (sprites de layers en cache)
+        self.compositor = Compositor()
+        # géométrie des layers de la frame affichée (voir _frame_geometry)
+        self._geometry = None
+        self._geometry_key = None
+
+        # moteur d'évaluation vectorisé (pistes de keyframes en colonnes NumPy)
+        self.kf_engine = KeyframeEngine(default_easing='linear' if animate else 'hold')
+        # curseur incrémental utilisé pendant la lecture (le temps ne fait qu'avancer)
+        self.playback_cursor = PlaybackCursor(self.kf_engine)
+        # cadence du projet : les états de layers sont mémorisés par frame
+        self.frame_rate = 25
+        self.state_cache = LayerStateCache()
+        # échelle (zoom) de la timeline : conversions temps <-> x
+        self.timeline_scale = TimelineScale(self.frame_rate)
+        # enveloppe de la bande son (voir add_audio)
+        self.waveform_peaks = None
+
+        # rafraîchissements fusionnés : au plus un par frame d'affichage (par ordre de priorité)
+        self.redraw_scheduler = RedrawScheduler(self.root)
+        self.redraw_scheduler.register('drag', self._redraw_drag_layer)
+        self.redraw_scheduler.register('render', self.redraw_render)
+        self.redraw_scheduler.register('timeline', self.redraw_timeline)
+        self.redraw_scheduler.register('properties', self.update_properties_panel)
+        self.redraw_scheduler.register('layers', self.render_layers_list)
 
         # Build UI (paned windows)
         self.build_panes()
@@ -469,9 +499,67 @@ class CompositionApp:
         self.root.after(50, self.prompt_load_background)  # schedule after startup
         # Setup sash initial positions after window is mapped
         self.root.after(100, self.set_initial_sash_positions)
+        # mesures de performance (menu Affichage ou variable d'environnement WANDRILLE_PERF)
+        self._perf_hud_job = None
+        if PERF.enabled:
+            self.set_perf_hud(True)
 
 
 
+    # -------------------------
+    # Document access & change notifications
+    # -------------------------
+    @property
+    def layers(self):
+        return self.doc.layers
+
+    @property
+    def keyframes(self):
+        return self.doc.keyframes  # keyframes par layer
+
+    @property
+    def scene_keyframes(self):
+        return self.doc.scene_keyframes
+
+    @property
+    def scene_names(self):
+        # scene names: dictionary mapping scene keyframe index to its name
+        return self.doc.scene_names
+
+    @property
+    def audio_waveform(self):
+        return self.doc.audio_waveform
+
+    @property
+    def audio_duration(self):
+        return self.doc.audio_duration
+
+    @property
+    def audio_filename(self):
+        return self.doc.audio_filename
+
+    def _on_document_changed(self, events):
+        """Invalide les caches touchés et ne repeint que les vues concernées."""
+        views = set()
+        for kind, idx in events:
+            if kind == document_model.LAYER_GEOMETRY:
+                self.kf_engine.invalidate(idx, keyframes=False)
+                # pendant un drag, seul le layer manipulé est redessiné
+                if self._drag_preview is not None and idx == self._drag_preview['idx']:
+                    views.add('drag')
+                else:
+                    views.add('render')
+            elif kind == document_model.LAYER_KEYFRAMES:
+                self.kf_engine.invalidate(idx)
+                views.update(('render', 'timeline'))
+            elif kind == document_model.LAYERS:
+                self.kf_engine.invalidate()
+                views.update(('layers', 'properties', 'render', 'timeline'))
+            elif kind in (document_model.SCENE, document_model.AUDIO):
+                views.add('timeline')
+        # les vues sont repeintes à la prochaine frame (demandes fusionnées)
+        self.redraw_scheduler.request(*views)
+
     def build_panes(self):
         # top-level horizontal paned window (left / right)
         self.pw_lr = tk.PanedWindow(self.root, orient=tk.HORIZONTAL)
@@ -599,28 +687,22 @@ class CompositionApp:
             # Boutons monter/descendre
             def move_layer_up(i=idx):
                 if i > 0:
-                    self.layers[i-1], self.layers[i] = self.layers[i], self.layers[i-1]
-                    self.keyframes[i-1], self.keyframes[i] = self.keyframes[i], self.keyframes[i-1]
-                    # Met à jour l'index sélectionné si besoin
-                    if self.selected_index == i:
-                        self.selected_index = i-1
-                    elif self.selected_index == i-1:
-                        self.selected_index = i
-                    self.render_layers_list()
-                    self.redraw_render()
-                    self.redraw_timeline()
+                    with self.doc.batch():
+                        self.doc.move_layer(i, i-1)
+                        # Met à jour l'index sélectionné si besoin
+                        if self.selected_index == i:
+                            self.selected_index = i-1
+                        elif self.selected_index == i-1:
+                            self.selected_index = i
             def move_layer_down(i=idx):
                 if i < len(self.layers)-1:
-                    self.layers[i+1], self.layers[i] = self.layers[i], self.layers[i+1]
-                    self.keyframes[i+1], self.keyframes[i] = self.keyframes[i], self.keyframes[i+1]
-                    # Met à jour l'index sélectionné si besoin
-                    if self.selected_index == i:
-                        self.selected_index = i+1
-                    elif self.selected_index == i+1:
-                        self.selected_index = i
-                    self.render_layers_list()
-                    self.redraw_render()
-                    self.redraw_timeline()
+                    with self.doc.batch():
+                        self.doc.move_layer(i, i+1)
+                        # Met à jour l'index sélectionné si besoin
+                        if self.selected_index == i:
+                            self.selected_index = i+1
+                        elif self.selected_index == i+1:
+                            self.selected_index = i
             up_btn = ctk.CTkButton(fr, text="▲", width=24, command=move_layer_up)
             up_btn.pack(side="left", padx=2)
             down_btn = ctk.CTkButton(fr, text="▼", width=24, command=move_layer_down)
@@ -662,26 +744,14 @@ class CompositionApp:
                 opacity=100,
                 shape_type=shape_type
             )
-            self.layers.append(new)
-            self.keyframes.append([])
-            self.render_layers_list()
-            self.select_layer(len(self.layers)-1)
-            self.redraw_render()
+            self.select_layer(self.doc.add_layer(new))
             dialog.destroy()
     
         ctk.CTkButton(dialog, text="Créer", command=create_shape).pack(pady=20)
 
     def delete_layer(self, idx):
-        if 0 <= idx < len(self.layers):
-            del self.layers[idx]
-            if self.selected_index == idx:
-                self.selected_index = None
-            elif self.selected_index and self.selected_index > idx:
-                self.selected_index -= 1
-            self.render_layers_list()
-            self.update_properties_panel()
-            self.redraw_render()
-            self.redraw_timeline()
+        # supprime aussi les keyframes du layer et met à jour la sélection
+        self._delete_layer(idx)
 
     def select_layer(self, idx):
         self.selected_index = idx
@@ -690,9 +760,8 @@ class CompositionApp:
             self.last_selected_type = 'layer'
             self.last_selected_object = idx
         self.update_properties_panel()
-        self.redraw_render()
-        # highlight selection visually by redrawing; timeline update
-        self.redraw_timeline()
+        # highlight selection visually by redrawing (la timeline ne dépend pas de la sélection)
+        self.redraw_scheduler.request('render')
 
 
 
@@ -757,6 +826,14 @@ class CompositionApp:
         self.add_kf_btn = ctk.CTkButton(parent, text="Ajouter Keyframe", command=self.add_selected_keyframe)
         self.add_kf_btn.grid(row=8, column=0, padx=8, pady=(0,8))
 
+        # Courbe d'interpolation appliquée aux keyframes sélectionnées dans la timeline
+        easing_frame = ctk.CTkFrame(parent, fg_color="transparent", bg_color="transparent")
+        easing_frame.grid(row=9, column=0, sticky="ew", padx=8, pady=(0,8))
+        ctk.CTkLabel(easing_frame, text="Easing keyframes", anchor="w").pack(side="left", padx=6)
+        self.easing_var = ctk.StringVar(value="default")
+        ctk.CTkOptionMenu(easing_frame, values=["default"] + list(EASINGS), variable=self.easing_var,
+                          command=self.set_selected_keyframes_easing).pack(side="left", padx=6)
+
         self.update_properties_panel()
 
     def update_properties_panel(self):
@@ -769,13 +846,17 @@ class CompositionApp:
         layer = self.layers[self.selected_index]
         for w in (self.posx_slider, self.posy_slider, self.w_slider, self.h_slider, self.op_slider, self.rotation_slider, self.color_preview):
             w.configure(state="normal")
-        # set values (percents)
-        self.posx_slider.set(layer.x * 100)
-        self.posy_slider.set(layer.y * 100)
-        self.w_slider.set(layer.w * 100)
-        self.h_slider.set(layer.h * 100)
-        self.op_slider.set(layer.opacity)
-        self.rotation_slider.set(getattr(layer, 'rotation', 0))
+        # set values (percents) ; les callbacks des sliders ne doivent pas réécrire le layer
+        self._updating_panel = True
+        try:
+            self.posx_slider.set(layer.x * 100)
+            self.posy_slider.set(layer.y * 100)
+            self.w_slider.set(layer.w * 100)
+            self.h_slider.set(layer.h * 100)
+            self.op_slider.set(layer.opacity)
+            self.rotation_slider.set(layer.rotation)
+        finally:
+            self._updating_panel = False
         # color preview background via configure
         try:
             self.color_preview.configure(fg_color=layer.color)
@@ -783,48 +864,41 @@ class CompositionApp:
             pass
 
     def on_prop_change(self, *_):
+        if getattr(self, '_updating_panel', False):
+            return
         if self.selected_index is None or not (0 <= self.selected_index < len(self.layers)):
             return
-        layer = self.layers[self.selected_index]
-        layer.x = float(self.posx_slider.get()) / 100.0
-        layer.y = float(self.posy_slider.get()) / 100.0
-        layer.w = float(self.w_slider.get()) / 100.0
-        layer.h = float(self.h_slider.get()) / 100.0
-        layer.opacity = int(self.op_slider.get())
-        layer.rotation = float(self.rotation_slider.get())
-        # immediate update
-        self.redraw_render()
-        self.redraw_timeline()
+        # immediate update (the document notifies the render view)
+        self.doc.update_layer(
+            self.selected_index,
+            x=float(self.posx_slider.get()) / 100.0,
+            y=float(self.posy_slider.get()) / 100.0,
+            w=float(self.w_slider.get()) / 100.0,
+            h=float(self.h_slider.get()) / 100.0,
+            opacity=int(self.op_slider.get()),
+            rotation=float(self.rotation_slider.get()),
+        )
 
     def pick_color(self):
         if self.selected_index is None:
             return
         res = colorchooser.askcolor(title="Choose layer color")
         if res and res[1]:
-            self.layers[self.selected_index].color = res[1]
+            self.doc.update_layer(self.selected_index, color=res[1])
             self.color_preview.configure(fg_color=res[1])
-            self.redraw_render()
-            self.redraw_timeline()
 
     def center_selected(self):
         if self.selected_index is None:
             return
         layer = self.layers[self.selected_index]
-        layer.x = 0.5 - layer.w / 2
-        layer.y = 0.5 - layer.h / 2
+        self.doc.update_layer(self.selected_index, x=0.5 - layer.w / 2, y=0.5 - layer.h / 2)
         self.update_properties_panel()
-        self.redraw_render()
-        self.redraw_timeline()
 
     def reset_size_selected(self):
         if self.selected_index is None:
             return
-        layer = self.layers[self.selected_index]
-        layer.w = 0.2
-        layer.h = 0.15
+        self.doc.update_layer(self.selected_index, w=0.2, h=0.15)
         self.update_properties_panel()
-        self.redraw_render()
-        self.redraw_timeline()
 
 
 
@@ -845,6 +919,8 @@ class CompositionApp:
         # use normal tkinter Canvas for fine control
         self.render_canvas = tk.Canvas(self.render_container, bg="#111111", highlightthickness=0)
         self.render_canvas.pack(fill="both", expand=True)
+        # items du canvas conservés d'une frame à l'autre
+        self.render_scene = RenderScene(self.render_canvas)
         self.render_canvas.bind("<Configure>", lambda e: self.on_render_resize(e.width, e.height))
         # allow selecting layers by clicking on canvas (hit test)
         self.render_canvas.bind("<Button-1>", self.on_render_click)
@@ -861,59 +937,51 @@ class CompositionApp:
         print("[DEBUG] Parcours de sélection (du dessus vers le dessous) :")
         for i in range(len(self.layers)-1, -1, -1):
             print(f"  idx={i} name={self.layers[i].name}")
-        found = None
-        for idx in range(len(self.layers)-1, -1, -1):
-
-            # Utiliser l'état direct si pas en lecture, sinon keyframe/interpolé
-            if not self.is_playing and idx == self.selected_index:
-                L = self.layers[idx]
-                state = {
-                    'x': L.x, 'y': L.y, 'w': L.w, 'h': L.h,
-                    'color': L.color, 'opacity': L.opacity,
-                    'rotation': getattr(L, 'rotation', 0)
-                }
-            else:
-                state = self._compute_layer_state_at_time(idx, self.get_playback_time())
-            # Calcul des coordonnées absolues et rotation
-            w = state['w'] * draw_w
-            h = state['h'] * draw_h
-            angle = state.get('rotation', 0)
-            cx = bx + state['x'] * draw_w + w/2
-            cy = by + state['y'] * draw_h + h/2
-            from math import cos, sin, radians
-            rot = radians(angle)
-            cos_a = cos(rot)
-            sin_a = sin(rot)
-            # Points du rectangle
-            points = [
-                (-w/2, -h/2),
-                (w/2, -h/2),
-                (w/2, h/2),
-                (-w/2, h/2)
-            ]
-            abs_points = []
-            for px, py in points:
-                rx = px * cos_a - py * sin_a + cx
-                ry = px * sin_a + py * cos_a + cy
-                abs_points.append((rx, ry))
-            # Test si le point (x, y) est dans le polygone
-            if self._point_in_polygon(x, y, abs_points):
-                found = idx
-                break
+        found = self._layer_at(x, y)
         if found is not None:
             print(f"[DEBUG] Layer sélectionné : idx={found} name={self.layers[found].name}")
             self.select_layer(found)
 
-    def _point_in_polygon(self, x, y, poly):
-        # Ray casting algorithm for convex polygon
-        n = len(poly)
-        inside = False
-        px, py = poly[-1]
-        for qx, qy in poly:
-            if ((qy > y) != (py > y)) and (x < (px - qx) * (y - qy) / (py - qy + 1e-12) + qx):
-                inside = not inside
-            px, py = qx, qy
-        return inside
+    def _displayed_layer_states(self):
+        """États des layers tels qu'affichés : pendant un drag, le layer manipulé suit ses propriétés directes."""
+        states = list(self._compute_all_layer_states_at_time(self.get_playback_time()))
+        idx = self.selected_index
+        if (not self.is_playing) and (idx is not None) and (getattr(self, '_drag_mode', None) is not None):
+            L = self.layers[idx]
+            states[idx] = {
+                'x': L.x, 'y': L.y, 'w': L.w, 'h': L.h,
+                'rgb': L.rgb, 'opacity': L.opacity,
+                'rotation': L.rotation,
+                'shape_type': L.shape_type
+            }
+        return states
+
+    def _frame_geometry(self, states=None):
+        """Géométrie (coins, poignées, AABB) des layers affichés, en pixels du canvas.
+
+        Calculée une seule fois par frame : le rendu, les clics et les poignées la partagent.
+        """
+        bx, by, draw_w, draw_h, _ = self._render_geometry()
+        key = (self._state_time(self.get_playback_time())[0], self.doc.revision, (bx, by, draw_w, draw_h),
+               self.is_playing, getattr(self, '_drag_mode', None) is not None)
+        if key != self._geometry_key:
+            if states is None:
+                states = self._displayed_layer_states()
+            self._geometry = LayerGeometry.from_states(states, bx, by, draw_w, draw_h)
+            self._geometry_key = key
+        return self._geometry
+
+    def _layer_at(self, x, y):
+        """Index du layer le plus haut sous le point (x, y) du canvas de rendu, ou None.
+
+        Un seul test point / rectangle tourné vectorisé sur tous les layers de la frame (la
+        géométrie est déjà calculée pour le rendu) ; seule la partie visible de l'image est cliquable.
+        """
+        visible = self._visible_rect()
+        if visible is None or not (visible[0] <= x < visible[2] and visible[1] <= y < visible[3]):
+            return None
+        hits = np.flatnonzero(self._frame_geometry().contains(x, y))
+        return int(hits[-1]) if hits.size else None
 
     def prompt_load_background(self):
         messagebox.showinfo("Background image", "Veuillez sélectionner une image de fond pour la composition (PNG/JPG)...")
@@ -932,159 +1000,130 @@ class CompositionApp:
                 messagebox.showwarning("Erreur", f"Impossible d'ouvrir l'image: {e}")
                 self.bg_image = Image.new("RGBA", (1280, 720), (30,30,30))
                 self.bg_orig_size = self.bg_image.size
-        self.redraw_render()
+        self.bg_cache.set_image(self.bg_image)
+        self.redraw_scheduler.request('render')
 
     def _render_geometry(self):
-        # Compute how background is fitted (contain) into canvas
+        # Compute how background is fitted (contain) into canvas, then apply zoom / pan
         cw = max(1, self.render_canvas.winfo_width())
         ch = max(1, self.render_canvas.winfo_height())
         if not self.bg_image:
             return 0,0,0,0,1.0
-        bw, bh = self.bg_orig_size
-        scale = min(cw / bw, ch / bh)
-        draw_w = int(bw * scale)
-        draw_h = int(bh * scale)
-        offset_x = int((cw - draw_w) / 2)
-        offset_y = int((ch - draw_h) / 2)
-        return offset_x, offset_y, draw_w, draw_h, scale
+        return self.viewport.geometry(cw, ch, *self.bg_orig_size)
+
+    def _visible_rect(self):
+        """Partie visible de l'image de fond dans le canvas (x0, y0, x1, y1), ou None."""
+        bx, by, draw_w, draw_h, _ = self._render_geometry()
+        return Viewport.visible_rect(max(1, self.render_canvas.winfo_width()),
+                                     max(1, self.render_canvas.winfo_height()), bx, by, draw_w, draw_h)
 
     def on_render_resize(self, width, height):
         # Called when render canvas is resized
-        self.redraw_render()
+        self._view_change_time = time.monotonic()
+        self.redraw_scheduler.request('render')
+
+    def _render_interacting(self):
+        """True pendant un drag ou un pan sur le rendu, ou juste après un zoom / redimensionnement."""
+        if getattr(self, '_drag_mode', None) is not None or self._pan_start is not None:
+            return True
+        return (time.monotonic() - self._view_change_time) * 1000 < BG_REFINE_DELAY_MS
+
+    def _schedule_bg_refine(self):
+        if self._bg_refine_job is not None:
+            self.root.after_cancel(self._bg_refine_job)
+        self._bg_refine_job = self.root.after(BG_REFINE_DELAY_MS, self._refine_background)
+
+    def _refine_background(self):
+        # passe LANCZOS différée, puis nouvelle composition de la frame
+        self._bg_refine_job = None
+        if not self.bg_image:
+            return
+        # tant que la pyramide se construit, LANCZOS partirait de l'original : on attend
+        if self._render_interacting() or not self.bg_cache.pyramid_ready(timeout=0):
+            self._schedule_bg_refine()
+            return
+        self.redraw_scheduler.request('render')
+
+    # --- Mesures de performance (voir perf_monitor.py) ---
+    def set_perf_hud(self, enabled):
+        """Active / désactive les mesures et leur affichage sur la vue de rendu."""
+        PERF.set_enabled(enabled)
+        if hasattr(self, 'perf_var') and self.perf_var.get() != PERF.enabled:
+            self.perf_var.set(PERF.enabled)
+        if self._perf_hud_job is not None:
+            self.root.after_cancel(self._perf_hud_job)
+            self._perf_hud_job = None
+        if PERF.enabled:
+            PERF.reset()
+            self._update_perf_hud()
+        else:
+            self.render_scene.set_hud(None)
 
+    def _update_perf_hud(self):
+        self._perf_hud_job = None
+        if not PERF.enabled:
+            return
+        PERF.count('render_items', self.render_scene.item_count())
+        PERF.count('timeline_items', len(self.timeline_canvas.find_all()))
+        PERF.count('timeline_items_created', self.timeline_scene.created)
+        sched = self.redraw_scheduler.stats()
+        PERF.count('flush_over_budget', sched['over_budget'])
+        PERF.count('views_deferred', sched['deferred'])
+        self.render_scene.set_hud("\n".join(PERF.summary_lines()) or "mesures de performance...", 8, 8)
+        PERF.maybe_log()
+        self._perf_hud_job = self.root.after(PERF_HUD_INTERVAL_MS, self._update_perf_hud)
+
+    @timed('redraw_render')
     def redraw_render(self):
+        # frame composée hors écran (alpha réel par layer) puis affichée en une seule image ;
+        # les items du canvas (frame, sélection, poignées) sont conservés d'un redraw à l'autre
         c = self.render_canvas
-        c.delete("all")
+        scene = self.render_scene
         cw = c.winfo_width()
         ch = c.winfo_height()
         if cw <= 1 or ch <= 1:
             return
 
         if not self.bg_image:
-            c.create_text(cw/2, ch/2, text="No background", fill="white")
+            scene.show_message("No background", cw/2, ch/2)
             return
 
         bx, by, draw_w, draw_h, scale = self._render_geometry()
-    
-        try:
-            bg_resized = self.bg_image.resize((draw_w, draw_h), Image.LANCZOS)
-            self.bg_tk = ImageTk.PhotoImage(bg_resized)
-            c.create_image(bx, by, anchor="nw", image=self.bg_tk, tags="bg")
-        except Exception as e:
-            print("Error resizing background:", e)
-
-        playback_time = self.get_playback_time()
-    
-        for real_idx in range(len(self.layers)):
-            L = self.layers[real_idx]
-            if (not self.is_playing) and (real_idx == self.selected_index) and (getattr(self, '_drag_mode', None) is not None):
-                state = {
-                    'x': L.x, 'y': L.y, 'w': L.w, 'h': L.h,
-                    'color': L.color, 'opacity': L.opacity,
-                    'rotation': getattr(L, 'rotation', 0),
-                    'shape_type': getattr(L, 'shape_type', 'rectangle')
-                }
-            else:
-                state = self._compute_layer_state_at_time(real_idx, playback_time)
-        
-            x = bx + state['x'] * draw_w
-            y = by + state['y'] * draw_h
-            w = state['w'] * draw_w
-            h = state['h'] * draw_h
-            angle = state.get('rotation', 0)
-            shape_type = state.get('shape_type', 'rectangle')
-        
-            # Préparer la couleur avec opacité
-            color = state['color']
-            opacity = state.get('opacity', 100)
-        
-            # Convertir l'opacité en stipple uniquement pour affichage
-            stipple = "gray50" if opacity < 100 else ""
-        
-            # Dessiner selon le type de forme
-            if shape_type == "circle":
-                # Pour un cercle, utiliser create_oval
-                cx = x + w/2
-                cy = y + h/2
-                # Utiliser le plus petit des deux pour un cercle parfait
-                radius = min(w, h) / 2
-            
-                c.create_oval(
-                    cx - radius, cy - radius,
-                    cx + radius, cy + radius,
-                    fill=color,
-                    outline="",  # Pas de bordure par défaut
-                    stipple=stipple,
-                    tags=f"layer_{real_idx}"
-                )
-            
-            else:  # rectangle
-                cx = x + w/2
-                cy = y + h/2
-            
-                points = [
-                    (-w/2, -h/2),
-                    (w/2, -h/2),
-                    (w/2, h/2),
-                    (-w/2, h/2)
-                ]
-            
-                from math import cos, sin, radians
-                rot = radians(angle)
-                cos_a = cos(rot)
-                sin_a = sin(rot)
-                rotated_points = []
-                for px, py in points:
-                    rx = px * cos_a - py * sin_a + cx
-                    ry = px * sin_a + py * cos_a + cy
-                    rotated_points.extend([rx, ry])
-            
-                c.create_polygon(
-                    rotated_points,
-                    fill=color,
-                    outline="",  # Pas de bordure par défaut
-                    stipple=stipple,
-                    tags=f"layer_{real_idx}"
-                )
-        
-        # Dessiner la bordure en pointillés UNIQUEMENT si sélectionné
-            if real_idx == self.selected_index:
-                cx = x + w/2
-                cy = y + h/2
-                from math import cos, sin, radians
-                rot = radians(angle)
-                cos_a = cos(rot)
-                sin_a = sin(rot)
-            
-                points = [
-                    (-w/2, -h/2),
-                    (w/2, -h/2),
-                    (w/2, h/2),
-                    (-w/2, h/2)
-                ]
-            
-                rotated_points = []
-                for px, py in points:
-                    rx = px * cos_a - py * sin_a + cx
-                    ry = px * sin_a + py * cos_a + cy
-                    rotated_points.extend([rx, ry])
-            
-                c.create_polygon(
-                    rotated_points,
-                    fill="",
-                    outline="#1F6AA5",
-                    width=1,
-                    dash=(4, 4),  # Pointillés
-                    tags="selection_border"
-                )
-            
-                # Dessiner les poignées
-                self._draw_layer_handles(real_idx, state, bx, by, draw_w, draw_h)
-
-
 
+        states = self._displayed_layer_states()
+        geom = self._frame_geometry(states)
+        rgb, opacity = styles_from_states(states)
 
+        # seule la partie visible de l'image est composée (les layers hors champ sont écartés)
+        visible = self._visible_rect()
+        try:
+            if visible is not None:
+                vx0, vy0, vx1, vy1 = visible
+                # fond en cache par taille : rééchantillonnage rapide pendant les interactions
+                # et tant que la pyramide n'est pas prête (LANCZOS depuis l'original 4K sinon),
+                # version LANCZOS dès que l'utilisateur est inactif
+                fast = self._render_interacting() or not self.bg_cache.pyramid_ready(timeout=0)
+                with PERF.span('background_resize'):
+                    background, final = self.bg_cache.region((draw_w, draw_h), (vx0 - bx, vy0 - by, vx1 - bx, vy1 - by),
+                                                             fast=fast)
+                if not final:
+                    self._schedule_bg_refine()
+                if self._drag_preview is not None:
+                    self._render_drag_preview(states, geom, background, visible)
+                    return
+                frame = self.compositor.render(background, geom, rgb, opacity, origin=(vx0, vy0))
+                scene.set_frame(frame, vx0, vy0)
+            else:
+                scene.hide_frame()
+        except Exception as e:
+            print("Error compositing frame:", e)
 
+        # Bordure en pointillés et poignées UNIQUEMENT si un layer est sélectionné
+        if self.selected_index is not None and self.selected_index < len(geom):
+            self._draw_layer_handles(self.selected_index, geom)
+        else:
+            scene.set_selection(None)
+        scene.finish()
 
     # -------------------------
     # Bottom-right: Timeline
@@ -1118,7 +1157,11 @@ class CompositionApp:
         self.timeline_canvas = tk.Canvas(parent, height=250, bg="#222222", highlightthickness=0)
         self.h_scroll = tk.Scrollbar(parent, orient=tk.HORIZONTAL, command=self.timeline_canvas.xview)
         self.v_scroll = tk.Scrollbar(parent, orient=tk.VERTICAL, command=self.timeline_canvas.yview)
-        self.timeline_canvas.configure(xscrollcommand=self.h_scroll.set, yscrollcommand=self.v_scroll.set)
+        self.timeline_canvas.configure(xscrollcommand=self._on_timeline_xscroll, yscrollcommand=self.v_scroll.set)
+        # items recyclés (voir timeline_scene.py) ; fenêtre horizontale actuellement dessinée
+        self.timeline_scene = TimelineScene(self.timeline_canvas)
+        self._timeline_size = None
+        self._timeline_drawn = None
         self.v_scroll.pack(fill="y", side="right", pady=(0,8))
         self.timeline_canvas.pack(fill="both", expand=True, padx=8, pady=(0,4))
         self.h_scroll.pack(fill="x", padx=8, pady=(0,8))
@@ -1145,8 +1188,23 @@ class CompositionApp:
         except Exception:
             pass
 
+        # Ctrl+molette : zoom de la timeline
+        self.timeline_canvas.bind('<Control-MouseWheel>', self._on_timeline_wheel)
+        self.timeline_canvas.bind('<Control-Button-4>', self._on_timeline_wheel)
+        self.timeline_canvas.bind('<Control-Button-5>', self._on_timeline_wheel)
+
         # bind resize
-        self.timeline_canvas.bind("<Configure>", lambda e: self.redraw_timeline())
+        self.timeline_canvas.bind("<Configure>", lambda e: self.redraw_scheduler.request('timeline'))
+
+    def _on_timeline_xscroll(self, first, last):
+        """xscrollcommand de la timeline : redessine quand la vue sort de la fenêtre dessinée."""
+        self.h_scroll.set(first, last)
+        if self._timeline_drawn is None or self._timeline_size is None:
+            return
+        width = self._timeline_size[0]
+        x0, x1 = self._timeline_drawn
+        if float(first) * width < x0 or float(last) * width > x1:
+            self.redraw_scheduler.request('timeline')
 
     def add_keyframe(self, layer_idx, time):
         L = self.layers[layer_idx]
@@ -1154,13 +1212,28 @@ class CompositionApp:
             time,
             L.x, L.y, L.w, L.h,
             L.color, L.opacity,
-            getattr(L, 'rotation', 0),
-            getattr(L, 'shape_type', 'rectangle')
+            L.rotation,
+            L.shape_type
         )
-        self.keyframes[layer_idx].append(kf)
-        self.keyframes[layer_idx].sort(key=lambda k: k.time)
-        self.redraw_timeline()
-        self.redraw_render()
+        pos = self.doc.add_keyframe(layer_idx, kf)
+        # les keyframes sélectionnées situées après la nouvelle changent d'index
+        self.selected_keyframes.shift(layer_idx, pos, 1)
+        if (self.last_selected_type == 'keyframe' and self.last_selected_object
+                and self.last_selected_object[0] == layer_idx and self.last_selected_object[1] >= pos):
+            self.last_selected_object = (layer_idx, self.last_selected_object[1] + 1)
+
+    def set_selected_keyframes_easing(self, easing):
+        """Applique une courbe d'easing aux keyframes sélectionnées ('default' = mode global)."""
+        easing = None if easing == "default" else easing
+        with self.doc.batch():
+            for layer_idx, kf_idx in list(self.selected_keyframes):
+                try:
+                    kf = self.keyframes[layer_idx][kf_idx]
+                except IndexError:
+                    continue
+                kf.easing = easing
+                kf.easing_params = None
+                self.doc.keyframes_changed(layer_idx)
 
     def add_selected_keyframe(self):
         if self.selected_index is not None:
@@ -1193,119 +1266,111 @@ class CompositionApp:
         
         def confirm_scene():
             scene_name = name_entry.get().strip() or f"Scene{keyframe_idx + 1}"
-            # Ajouter le keyframe de scène
-            self.scene_keyframes.append(float(t))
-            self.scene_keyframes.sort()
-            # Stocker le nom de la scène avec l'index de son keyframe
-            self.scene_names[keyframe_idx] = scene_name
-            self.redraw_timeline()
+            # Ajouter le keyframe de scène (son nom est stocké avec l'index de son keyframe)
+            self.doc.add_scene_keyframe(t, scene_name)
             dialog.destroy()
         
         ctk.CTkButton(dialog, text="Valider", command=confirm_scene).pack(pady=10)
 
+    @timed('redraw_timeline')
     def redraw_timeline(self):
         try:
             c = self.timeline_canvas
-            c.delete("all")
-            width = max(300000, self.timeline_canvas.winfo_width())
+            scene = self.timeline_scene
+            scale = self.timeline_scale
+            width = self._timeline_width()
             #height = self.timeline_canvas.winfo_height()
             height = max(1000, self.timeline_canvas.winfo_height())
 
             # configure scrollregion
-            c.configure(scrollregion=(0,0,width, height))
-            # draw a time ruler at top
+            if (width, height) != self._timeline_size:
+                c.configure(scrollregion=(0,0,width, height))
+                self._timeline_size = (width, height)
 
-            total_seconds = max(10.0, self.audio_duration, 7200.0)
-            pixels_per_second = width / total_seconds
+            pixels_per_second = scale.pixels_per_second
 
-            # draw grid ticks every second and label every 5 seconds
-            for s in range(0, int(math.ceil(total_seconds))+1):
-                x = s * pixels_per_second
-                c.create_line(x, 0, x, 12, fill="#555")
-                
-                if s % 5 == 0:
-                    c.create_line(x, 0, x, 15, fill="#555", width=3)
-                    tlabel = self._format_timecode(s)[:8]
-                    c.create_text(x-20.5, 14, anchor="nw", text=tlabel, fill="#aaa", font=("TkDefaultFont", 8))
+            # fenêtre dessinée : partie visible (xview) plus une marge de chaque côté ;
+            # _on_timeline_xscroll redemande un redraw quand la vue en sort
+            view_x0 = c.xview()[0] * width
+            view_w = max(1, c.winfo_width())
+            margin = max(TIMELINE_MIN_MARGIN_PX, view_w * TIMELINE_MARGIN)
+            x0 = max(0.0, view_x0 - margin)
+            x1 = min(float(width), view_x0 + view_w + margin)
+            self._timeline_drawn = (x0, x1)
+            t0 = x0 / pixels_per_second
+            t1 = x1 / pixels_per_second
+
+            scene.begin()
+
+            # draw a time ruler at top
+            # pas des graduations / étiquettes selon le zoom (frames, secondes, minutes)
+            _, label_step = scale.tick_steps()
+            for t, labelled in scale.ticks(t0, t1):
+                x = scale.time_to_x(t)
+                if labelled:
+                    scene.draw('tick', (x, 0, x, 15), fill="#555", width=3)
+                    tlabel = scale.label(t, label_step)
+                    scene.draw('tick_label', (x-20.5, 14), anchor="nw", text=tlabel, fill="#aaa", font=("TkDefaultFont", 8))
+                else:
+                    scene.draw('tick', (x, 0, x, 12), fill="#555", width=1)
 
             # draw tracks: one per layer, and one audio track at bottom
-            track_h = 28
-            padding = 8
-            y = 30
+            track_h = TIMELINE_TRACK_H
+            padding = TIMELINE_TRACK_PADDING
+            y = TIMELINE_TRACKS_TOP
 
 
 
-            c.create_rectangle(0, y, width, y + track_h, fill="#0777a4", outline="#2b2b2b")
+            scene.draw('track', (x0, y, x1, y + track_h), fill="#0777a4", outline="#2b2b2b")
             # Dessiner les keyframes de scène
-            c.create_text(12, y+6, anchor="nw", text="Scenes", fill="white", font=("TkDefaultFont",9))
+            scene.draw('track_label', (12, y+6), anchor="nw", text="Scenes", fill="white", font=("TkDefaultFont",9))
             if self.scene_keyframes:
                 for sk in self.scene_keyframes:
+                    if not t0 <= sk <= t1:
+                        continue
                     x_sk = sk * pixels_per_second
                     # diamond marker (losange)
                     size = 6
-                    c.create_polygon(x_sk, y + track_h//2 - size, x_sk + size, y + track_h//2, x_sk, y + track_h//2 + size, x_sk - size, y + track_h//2, fill="#fff", outline="#000")
+                    scene.draw('scene_marker', (x_sk, y + track_h//2 - size, x_sk + size, y + track_h//2, x_sk, y + track_h//2 + size, x_sk - size, y + track_h//2), fill="#fff", outline="#000")
             y += track_h + padding
 
 
 
             for idx, L in enumerate(self.layers):
-                c.create_rectangle(0, y, width, y + track_h, fill="#1e1e1e", outline="#2b2b2b")
+                scene.draw('track', (x0, y, x1, y + track_h), fill="#1e1e1e", outline="#2b2b2b")
                 # Dessiner les keyframes pour ce layer
-                c.create_text(12, y+6, anchor="nw", text=L.name, fill="white", font=("TkDefaultFont",9))
+                scene.draw('track_label', (12, y+6), anchor="nw", text=L.name, fill="white", font=("TkDefaultFont",9))
                 if idx < len(self.keyframes):
-                    for kf in self.keyframes[idx]:
+                    # keyframes triées par temps : seule la tranche visible est parcourue
+                    kfs = self.keyframes[idx]
+                    selection = self.selected_keyframes
+                    for k in range(*kfs.range(t0, t1)):
+                        kf = kfs[k]
                         x_kf = kf.time * pixels_per_second
-                        c.create_oval(x_kf-6, y+track_h//2-6, x_kf+6, y+track_h//2+6, fill=kf.color, outline="#000000", width=2)
+                        outline = "#FFFFFF" if (idx, k) in selection else "#000000"
+                        scene.draw('keyframe', (x_kf-6, y+track_h//2-6, x_kf+6, y+track_h//2+6), fill=kf.color, outline=outline, width=2)
                 y += track_h + padding
 
             # audio track
             audio_track_y = y
-            c.create_rectangle(0, audio_track_y, width, audio_track_y + 80, fill="#111111", outline="#2b2b2b")
-            c.create_text(6, audio_track_y+4, anchor="nw", text="Audio", fill="white")
-            # draw waveform if exists
-            if self.audio_waveform is not None and len(self.audio_waveform) > 0:
-                wf = self.audio_waveform  # numpy array scaled -1..1
-                # map waveform samples across width using same coordinate system as timeline
-                samples = wf
-                
-                # Limit display resolution to avoid performance issues
-                max_display_points = 4096
-                actual_points = min(len(samples), max_display_points)
-                
-                # Downsample if needed
-                if len(samples) > actual_points:
-                    # Group samples and average for simpler visualization
-                    samples_per_group = len(samples) // actual_points
-                    trimmed_len = actual_points * samples_per_group
-                    samples_ds = samples[:trimmed_len].reshape(actual_points, samples_per_group).mean(axis=1)
-                else:
-                    samples_ds = samples
-                
+            scene.draw('track', (x0, audio_track_y, x1, audio_track_y + 80), fill="#111111", outline="#2b2b2b")
+            scene.draw('track_label', (6, audio_track_y+4), anchor="nw", text="Audio", fill="white")
+            # draw waveform if exists : enveloppe min / max lue dans la pyramide de pics
+            # (niveau choisi selon le zoom, tranche visible seulement)
+            peaks = self.waveform_peaks
+            if peaks is not None and len(peaks):
                 mid_y = audio_track_y + 40
                 amp_h = 34
-                
-                # Calculate x spacing using the same pixels_per_second as the timeline
-                # Each display point represents (audio_duration / actual_points) seconds
-                pixels_per_display_point = (self.audio_duration * pixels_per_second) / actual_points if actual_points > 0 else 1
-                
-                points = []
-                for i, v in enumerate(samples_ds):
-                    x = i * pixels_per_display_point
-                    y_p = mid_y - v * amp_h
-                    points.append((x, y_p))
-                # draw top half
-                poly_top = []
-                for x,y_p in points:
-                    poly_top.append(x)
-                    poly_top.append(y_p)
-                # bottom half mirror to create filled polygon
-                poly = poly_top + [width-1, mid_y, 0, mid_y]
-                try:
-                    c.create_polygon(poly, fill="#4caf50", outline="#2e7d32")
-                except Exception:
-                    # fallback: draw line
-                    for i in range(len(points)-1):
-                        c.create_line(points[i][0], points[i][1], points[i+1][0], points[i+1][1], fill="#4caf50")
+                times, mins, maxs = peaks.window(t0, t1, pixels_per_second)
+                if len(times) >= 2:
+                    xs = times * pixels_per_second
+                    # bord haut (max) de gauche à droite puis bord bas (min) de droite à gauche
+                    top = np.column_stack((xs, mid_y - maxs * amp_h))
+                    bottom = np.column_stack((xs[::-1], mid_y - mins[::-1] * amp_h))
+                    poly = np.concatenate((top, bottom)).ravel().tolist()
+                    scene.draw('waveform', poly, fill="#4caf50", outline="#2e7d32")
+
+            scene.end()
 
             # After redrawing the timeline contents, create/update the playback cursor
             # via the dedicated helper so we can refresh it independently.
@@ -1335,6 +1400,7 @@ class CompositionApp:
             edit_menu = tk.Menu(menubar, tearoff=0)
             objects_menu = tk.Menu(menubar, tearoff=0)
             preferences_menu = tk.Menu(menubar, tearoff=0)
+            view_menu = tk.Menu(menubar, tearoff=0)
 
             #sous menus
             file_export_menu = tk.Menu(file_menu, tearoff=0)
@@ -1344,6 +1410,7 @@ class CompositionApp:
             menubar.add_cascade(label="Fichier", menu=file_menu)
             menubar.add_cascade(label="Édition", menu=edit_menu)
             menubar.add_cascade(label="Objets", menu=objects_menu)
+            menubar.add_cascade(label="Affichage", menu=view_menu)
             menubar.add_cascade(label="Preferences", menu=preferences_menu)
 
             #fichier menu
@@ -1373,9 +1440,28 @@ class CompositionApp:
             objects_menu.add_command(label="Renommer", accelerator="Ctrl+R")
 
 
+            #affichage menu
+            view_menu.add_command(label="zoom avant", accelerator="Molette", command=lambda: self.zoom_view(WHEEL_STEP))
+            view_menu.add_command(label="zoom arrière", accelerator="Molette", command=lambda: self.zoom_view(1 / WHEEL_STEP))
+            view_menu.add_command(label="ajuster à la fenêtre", command=self.reset_view)
+            view_menu.add_separator()
+            view_menu.add_command(label="déplacer la vue : Espace + glisser", state="disabled")
+            view_menu.add_separator()
+            view_menu.add_command(label="timeline : zoom avant", accelerator="Ctrl+Molette", command=lambda: self.zoom_timeline(TIMELINE_WHEEL_STEP))
+            view_menu.add_command(label="timeline : zoom arrière", accelerator="Ctrl+Molette", command=lambda: self.zoom_timeline(1 / TIMELINE_WHEEL_STEP))
+            view_menu.add_command(label="timeline : ajuster à la sélection", command=self.zoom_timeline_to_selection)
+            view_menu.add_command(label="timeline : tout afficher", command=self.fit_timeline)
+            view_menu.add_separator()
+            self.perf_var = tk.BooleanVar(value=PERF.enabled)
+            view_menu.add_checkbutton(label="mesures de performance", variable=self.perf_var,
+                                      command=lambda: self.set_perf_hud(self.perf_var.get()))
+
             #preferences menu
             preferences_menu.add_command(label="swap theme", command=self.menu_cmd().swap_theme)
             preferences_menu.add_cascade(label="change color", menu=preferences_color_menu)
+            self.linear_light_var = tk.BooleanVar(value=self.kf_engine.linear_light)
+            preferences_menu.add_checkbutton(label="couleurs interpolées en lumière linéaire",
+                                             variable=self.linear_light_var, command=self.toggle_linear_light)
 
             preferences_color_menu.add_command(label="bleu")
             preferences_color_menu.add_command(label="bleu foncé")
@@ -1386,6 +1472,12 @@ class CompositionApp:
             pass
 
 
+    def toggle_linear_light(self):
+        self.kf_engine.linear_light = bool(self.linear_light_var.get())
+        self.kf_engine.invalidate()
+        self.state_cache.clear()
+        self.redraw_scheduler.request('render')
+
     class menu_cmd:
         def swap_theme(self):
             if ctk.get_appearance_mode() == "Dark":
@@ -1402,64 +1494,65 @@ class CompositionApp:
                 ctk.set_default_color_theme("blue")
 
 
+    def _frame_at(self, time):
+        return int(round(time * self.frame_rate))
+
+    def _state_time(self, time):
+        """(clé de cache, instant évalué) pour l'état des layers à `time`.
+
+        En lecture, et quand la tête de lecture est sur une frame, les états sont quantifiés
+        à la frame (clé = numéro de frame). À l'arrêt entre deux frames (seek, keyframe posée
+        à l'instant courant), on évalue à l'instant exact pour afficher ce qui a été édité.
+        """
+        frame = self._frame_at(time)
+        if self.is_playing or abs(time * self.frame_rate - frame) < 1e-6:
+            return frame, frame / self.frame_rate
+        return ('t', time), time
+
+    @timed('compute_layer_state')
     def _compute_layer_state_at_time(self, idx, time):
-        from __main__ import animate
         L = self.layers[idx]
-        state = {
-            'x': L.x, 'y': L.y, 'w': L.w, 'h': L.h, 
-            'color': L.color, 'opacity': L.opacity, 
-            'rotation': getattr(L, 'rotation', 0),
-            'shape_type': getattr(L, 'shape_type', 'rectangle')
-        }
-    
-        if idx < len(self.keyframes):
-            kfs = self.keyframes[idx]
-            if kfs:
-                kf_prev = max((kf for kf in kfs if kf.time <= time), 
-                             key=lambda k: k.time, default=None)
-                kf_next = min((kf for kf in kfs if kf.time > time), 
-                             key=lambda k: k.time, default=None)
-            
-                if animate and kf_prev and kf_next:
-                    t0, t1 = kf_prev.time, kf_next.time
-                    alpha = (time - t0) / (t1 - t0) if t1 > t0 else 0
-                    state['x'] = kf_prev.x + (kf_next.x - kf_prev.x) * alpha
-                    state['y'] = kf_prev.y + (kf_next.y - kf_prev.y) * alpha
-                    state['w'] = kf_prev.w + (kf_next.w - kf_prev.w) * alpha
-                    state['h'] = kf_prev.h + (kf_next.h - kf_prev.h) * alpha
-                
-                    def interp_color(c1, c2, a):
-                        c1 = c1.lstrip('#'); c2 = c2.lstrip('#')
-                        r1,g1,b1 = int(c1[0:2],16),int(c1[2:4],16),int(c1[4:6],16)
-                        r2,g2,b2 = int(c2[0:2],16),int(c2[2:4],16),int(c2[4:6],16)
-                        r = int(r1 + (r2-r1)*a)
-                        g = int(g1 + (g2-g1)*a)
-                        b = int(b1 + (b2-b1)*a)
-                        return f'#{r:02x}{g:02x}{b:02x}'
-                
-                    state['color'] = interp_color(kf_prev.color, kf_next.color, alpha)
-                    state['opacity'] = int(kf_prev.opacity + (kf_next.opacity - kf_prev.opacity) * alpha)
-                    state['rotation'] = getattr(kf_prev, 'rotation', 0) + \
-                                      (getattr(kf_next, 'rotation', 0) - getattr(kf_prev, 'rotation', 0)) * alpha
-                    state['shape_type'] = getattr(kf_prev, 'shape_type', 'rectangle')
-                
-                elif kf_prev:
-                    state.update({
-                        'x': kf_prev.x, 'y': kf_prev.y, 'w': kf_prev.w, 'h': kf_prev.h,
-                        'color': kf_prev.color, 'opacity': kf_prev.opacity,
-                        'rotation': getattr(kf_prev, 'rotation', 0),
-                        'shape_type': getattr(kf_prev, 'shape_type', 'rectangle')
-                    })
-                elif kf_next:
-                    state.update({
-                        'x': kf_next.x, 'y': kf_next.y, 'w': kf_next.w, 'h': kf_next.h,
-                        'color': kf_next.color, 'opacity': kf_next.opacity,
-                        'rotation': getattr(kf_next, 'rotation', 0),
-                        'shape_type': getattr(kf_next, 'shape_type', 'rectangle')
-                    })
-    
+        frame, t = self._state_time(time)
+        key = (L.uid, L.revision, frame)
+        state = self.state_cache.get(key)
+        if state is None:
+            self.kf_engine.sync(self.layers, self.keyframes)
+            values, shapes = self.kf_engine.evaluate(t, indices=[idx])
+            state = state_from_values(values[0], shapes[0])
+            self.state_cache.put(key, state)
         return state
 
+    @timed('compute_all_layer_states')
+    def _compute_all_layer_states_at_time(self, time):
+        """État de tous les layers à l'instant `time` (quantifié à la frame, voir _state_time).
+
+        Les états déjà mémorisés sont relus depuis le cache ; les autres sont évalués
+        ensemble en un seul appel vectorisé.
+        """
+        frame, t = self._state_time(time)
+        keys = [(L.uid, L.revision, frame) for L in self.layers]
+        states = [self.state_cache.get(key) for key in keys]
+        missing = [i for i, state in enumerate(states) if state is None]
+        if missing:
+            self.kf_engine.sync(self.layers, self.keyframes)
+            if self.is_playing and len(missing) == len(states):
+                values, shapes = self.playback_cursor.evaluate(t)
+            else:
+                values, shapes = self.kf_engine.evaluate(t, indices=missing)
+            for row, i in enumerate(missing):
+                states[i] = state_from_values(values[row], shapes[row])
+                self.state_cache.put(keys[i], states[i])
+        return states
+
+    def evaluate_many(self, times):
+        """Évalue tous les layers sur plusieurs instants en un seul appel.
+
+        Retourne (values, shapes) : tableaux denses (layers x temps x propriétés) et
+        (layers x temps), colonnes dans l'ordre de keyframe_engine.PROPS.
+        """
+        self.kf_engine.sync(self.layers, self.keyframes)
+        return self.kf_engine.evaluate_many(times)
+
 
     def export_images(self):
         folder = filedialog.askdirectory(title="Choisir le dossier de destination")
@@ -1485,8 +1578,7 @@ class CompositionApp:
     def export_keyframes_to_images(self, folder):
         times = set()
         for kfs in self.keyframes:
-            for k in kfs:
-                times.add(float(k.time))
+            times.update(kfs.times.tolist())
         times = sorted(times)
         if not times:
             raise Exception("Aucune keyframe à exporter")
@@ -1498,7 +1590,6 @@ class CompositionApp:
             bw, bh = 1280, 720
             bg_base = Image.new('RGBA', (bw, bh), (30,30,30))
 
-        from PIL import Image, ImageDraw
         import bisect
         from collections import defaultdict
 
@@ -1506,7 +1597,13 @@ class CompositionApp:
         scene_counters = defaultdict(int)
         pil_images = []
 
-        for t in times:
+        for t_idx, t in enumerate(times):
+            # évalue tous les layers sur le bloc d'instants suivant en un appel : la mémoire
+            # reste bornée (layers x EXPORT_EVAL_CHUNK) quel que soit le nombre d'instants
+            col = t_idx % EXPORT_EVAL_CHUNK
+            if col == 0:
+                values, shapes = self.evaluate_many(times[t_idx:t_idx + EXPORT_EVAL_CHUNK])
+
             # scene number starts at 1; each scene keyframe increments it for times >= keyframe
             if self.scene_keyframes:
                 scene_idx = bisect.bisect_right(self.scene_keyframes, t)
@@ -1524,35 +1621,10 @@ class CompositionApp:
             scene_counters[scene_idx] += 1
             y_idx = scene_counters[scene_idx]
 
-            img = bg_base.copy()
-            draw = ImageDraw.Draw(img)
-        
-            for idx in range(len(self.layers)):
-                state = self._compute_layer_state_at_time(idx, t)
-                x_px = int(state['x'] * bw)
-                y_px = int(state['y'] * bh)
-                w_px = max(1, int(state['w'] * bw))
-                h_px = max(1, int(state['h'] * bh))
-                shape_type = state.get('shape_type', 'rectangle')
-            
-                try:
-                    if shape_type == "circle":
-                        # Dessiner un cercle plein
-                        cx = x_px + w_px//2
-                        cy = y_px + h_px//2
-                        radius = min(w_px, h_px) // 2
-                        draw.ellipse(
-                            [cx - radius, cy - radius, cx + radius, cy + radius],
-                            fill=state['color']
-                        )
-                    else:
-                        # Dessiner un rectangle plein
-                        draw.rectangle(
-                            [x_px, y_px, x_px + w_px, y_px + h_px],
-                            fill=state['color']
-                        )
-                except Exception as e:
-                    print(f"Erreur lors du dessin: {e}")
+            # même compositeur que l'aperçu : opacité et rotation comprises
+            geom = LayerGeometry.from_values(values[:, col], shapes[:, col], 0, 0, bw, bh)
+            rgb, opacity = styles_from_values(values[:, col])
+            img = self.compositor.render(bg_base, geom, rgb, opacity)
         
             h = int(t // 3600)
             m = int((t % 3600) // 60)
@@ -1587,7 +1659,13 @@ class CompositionApp:
         f = filedialog.askopenfilename(title="Select audio file", filetypes=[("Audio files","*.wav *.mp3 *.flac *.ogg"), ("All files","*.*")])
         if not f:
             return
-        self.audio_filename = f
+        filename = f
+        # pics déjà calculés pour ce fichier (inchangé) : pas de décodage
+        cached = load_peak_cache(f)
+        if cached is not None:
+            self.waveform_peaks, duration = cached
+            self.doc.set_audio(None, duration, filename)
+            return
         # try WAV first using wave
         try:
             ext = os.path.splitext(f)[1].lower()
@@ -1611,8 +1689,7 @@ class CompositionApp:
                 if wf.ndim == 2 and wf.shape[1] > 1:
                     wf = wf.mean(axis=1)
                 
-                self.audio_waveform = wf
-                self.audio_duration = len(wf) / float(sr)
+                duration = len(wf) / float(sr)
             except Exception as norm_e:
                 print(f"[ERROR] Failed to normalize waveform: {norm_e}")
                 raise
@@ -1623,12 +1700,19 @@ class CompositionApp:
             dur = 12.0
             t = np.linspace(0, dur, int(sr*dur))
             wf = 0.6 * np.sin(2 * math.pi * 2 * t) * np.exp(-t/10.0)
-            self.audio_waveform = wf
-            self.audio_duration = dur
-            self.audio_filename = None
+            duration = dur
+            filename = None
 
+        # pyramide de pics min / max, calculée une fois pour toutes les redraws de la timeline
+        self.waveform_peaks = PeakPyramid.from_samples(wf, sr)
+        if filename is not None:
+            try:
+                save_peak_cache(filename, self.waveform_peaks, duration)
+            except (OSError, ValueError) as e:
+                print("Could not write waveform peak cache:", e)
         try:
-            self.redraw_timeline()
+            # the document notifies the timeline, which redraws the audio track
+            self.doc.set_audio(wf, duration, filename)
         except Exception as e:
             print(f"[ERROR] redraw_timeline failed: {e}")
             import traceback
@@ -1694,6 +1778,7 @@ class CompositionApp:
             if self.playback_job:
                 self.root.after_cancel(self.playback_job)
                 self.playback_job = None
+            PERF.end_ticks('playback')
         else:
             # Start playback and record precise start time so playback_time
             # is derived from real elapsed time (perf_counter) instead of
@@ -1714,6 +1799,7 @@ class CompositionApp:
         try:
             if not self.is_playing:
                 return
+            PERF.tick('playback', 1000.0 / self.frame_rate)
             # Compute precise playback time from perf_counter.
             try:
                 now = time.perf_counter()
@@ -1743,23 +1829,16 @@ class CompositionApp:
             try:
                 self.draw_playback_cursor()
             except Exception:
-                try:
-                    self.redraw_timeline()
-                except Exception:
-                    pass
+                self.redraw_scheduler.request('timeline')
 
             # Occasionally do a full render/redraw (to keep visuals updated)
-            try:
-                if self._playback_frame_count % 8 == 0:
-                    # full render less frequently
-                    self.redraw_timeline()
-                    self.redraw_render()
-            except Exception:
-                pass
+            if self._playback_frame_count % 8 == 0:
+                # full render less frequently
+                self.redraw_scheduler.request('timeline', 'render')
 
             # Schedule next tick. Playback time remains accurate because it's based on perf_counter.
             if self.is_playing:
-                self.playback_job = self.root.after(40, self.playback_loop)
+                self.playback_job = self.root.after(int(1000 / self.frame_rate), self.playback_loop)
         except Exception as e:
             print(f"[ERROR] playback_loop crashed: {e}")
             import traceback
@@ -1772,33 +1851,127 @@ class CompositionApp:
     
     def _time_to_timeline_x(self, time):
         # Convertit un temps en position x dans la timeline
-        width = max(300000, self.timeline_canvas.winfo_width())
-        # Use same logic as redraw_timeline for consistency
-        total_seconds = max(10.0, self.audio_duration, 7200.0)
-        return time * (width / total_seconds)
+        return self.timeline_scale.time_to_x(time)
 
     def _timeline_x_to_time(self, x):
         # Convertit une position x de la timeline en temps
-        width = max(300000, self.timeline_canvas.winfo_width())
-        # Use same logic as redraw_timeline to ensure consistency
-        total_seconds = max(10.0, self.audio_duration, 7200.0)
-        return x * (total_seconds / width)
+        return self.timeline_scale.x_to_time(x)
+
+    def _timeline_width(self):
+        """Largeur de la zone de défilement de la timeline au zoom courant."""
+        return max(int(math.ceil(self.timeline_scale.extent(self.audio_duration))),
+                   self.timeline_canvas.winfo_width())
+
+    # --- Zoom de la timeline (voir timeline_scale.py) ---
+    def _set_timeline_zoom(self, pixels_per_second, anchor_time, anchor_x):
+        """Change l'échelle en gardant `anchor_time` à la position `anchor_x` de la fenêtre."""
+        c = self.timeline_canvas
+        view_w = max(1, c.winfo_width())
+        # zoom arrière limité à la zone de défilement entière
+        min_pps = view_w / max(TIMELINE_MIN_SECONDS, self.audio_duration)
+        pps = self.timeline_scale.set_zoom(pixels_per_second, min_pps)
+        width = self._timeline_width()
+        height = max(1000, c.winfo_height())
+        c.configure(scrollregion=(0, 0, width, height))
+        self._timeline_size = (width, height)
+        c.xview_moveto(max(0.0, anchor_time * pps - anchor_x) / width)
+        self.redraw_scheduler.request('timeline')
+
+    def _on_timeline_wheel(self, event):
+        """Ctrl+molette : zoom de la timeline autour du pointeur."""
+        if getattr(event, 'num', None) == 4 or getattr(event, 'delta', 0) > 0:
+            factor = TIMELINE_WHEEL_STEP
+        else:
+            factor = 1 / TIMELINE_WHEEL_STEP
+        self.zoom_timeline(factor, event.x)
+        return "break"
+
+    def zoom_timeline(self, factor, anchor_x=None):
+        c = self.timeline_canvas
+        if anchor_x is None:
+            anchor_x = c.winfo_width() / 2
+        t = self._timeline_x_to_time(c.canvasx(anchor_x))
+        self._set_timeline_zoom(self.timeline_scale.pixels_per_second * factor, t, anchor_x)
+
+    def _fit_timeline(self, t0, t1):
+        view_w = max(1, self.timeline_canvas.winfo_width())
+        pps = self.timeline_scale.fit(t0, t1, view_w)
+        # intervalle centré dans la fenêtre
+        self._set_timeline_zoom(pps, (t0 + t1) / 2, view_w / 2)
+
+    def zoom_timeline_to_selection(self):
+        """Ajuste la timeline aux keyframes sélectionnées (ou au curseur de lecture)."""
+        times = []
+        for li, ki in self.selected_keyframes:
+            try:
+                times.append(self.keyframes[li][ki].time)
+            except IndexError:
+                continue
+        if not times:
+            times = [self.playback_time]
+        t0, t1 = min(times), max(times)
+        if t1 - t0 < TIMELINE_MIN_FIT_SECONDS:
+            mid = (t0 + t1) / 2
+            t0, t1 = mid - TIMELINE_MIN_FIT_SECONDS / 2, mid + TIMELINE_MIN_FIT_SECONDS / 2
+        self._fit_timeline(max(0.0, t0), t1)
+
+    def fit_timeline(self):
+        """Affiche tout le contenu : son, keyframes et keyframes de scène."""
+        end = max([10.0, self.audio_duration] + list(self.scene_keyframes)
+                  + [kfs.times[-1] for kfs in self.keyframes if len(kfs)])
+        self._fit_timeline(0.0, end)
 
     def get_playback_time(self):
         return self.playback_time
         
+    def _timeline_layer_at(self, y):
+        """Layer dont la piste contient l'ordonnée `y` (coordonnées canvas), ou None."""
+        row, offset = divmod(y - TIMELINE_TRACKS_TOP, TIMELINE_TRACK_H + TIMELINE_TRACK_PADDING)
+        # rangée 0 : piste des scènes ; les marges entre pistes ne sont pas cliquables
+        if row < 1 or offset > TIMELINE_TRACK_H:
+            return None
+        layer_idx = int(row) - 1
+        return layer_idx if layer_idx < len(self.keyframes) else None
+
+    def _timeline_keyframe_at(self, event):
+        """(layer, index) de la keyframe sous la souris : piste trouvée par y, puis recherche binaire sur
+        les temps triés de cette piste dans la tolérance en pixels ; None si aucune."""
+        c = self.timeline_canvas
+        layer_idx = self._timeline_layer_at(c.canvasy(event.y))
+        if layer_idx is None:
+            return None
+        t = self._timeline_x_to_time(c.canvasx(event.x))
+        kf_idx = self.keyframes[layer_idx].nearest(t, self._timeline_x_to_time(TIMELINE_HIT_PX))
+        return None if kf_idx is None else (layer_idx, kf_idx)
+
+    def _timeline_layers_between(self, y0, y1):
+        """Layers dont la piste coupe la bande verticale [y0, y1] (coordonnées canvas)."""
+        pitch = TIMELINE_TRACK_H + TIMELINE_TRACK_PADDING
+        first = max(1, math.ceil((y0 - TIMELINE_TRACKS_TOP - TIMELINE_TRACK_H) / pitch))
+        last = min(len(self.keyframes), math.floor((y1 - TIMELINE_TRACKS_TOP) / pitch))
+        return range(first - 1, last)
+
+    def _update_marquee(self, event):
+        """Rectangle de sélection : une requête par plage de temps sur chaque piste couverte."""
+        c = self.timeline_canvas
+        m = self._marquee
+        x, y = c.canvasx(event.x), c.canvasy(event.y)
+        if m['item'] is None:
+            m['item'] = c.create_rectangle(m['x'], m['y'], x, y, outline="#FFFFFF", dash=(3, 3), tags='marquee')
+        else:
+            c.coords(m['item'], m['x'], m['y'], x, y)
+        t0, t1 = sorted((self._timeline_x_to_time(m['x']), self._timeline_x_to_time(x)))
+        sel = m['base'].copy()
+        for li in self._timeline_layers_between(*sorted((m['y'], y))):
+            start, stop = self.keyframes[li].range(t0, t1)
+            if stop > start:
+                sel.add_range(li, start, stop)
+        self.selected_keyframes = sel
+        self.redraw_scheduler.request('timeline')
+
     def _timeline_mouse_down(self, event):
         # Cherche une keyframe sous la souris
-        clicked = None
-        best_distance = float('inf')
-        for layer_idx, keyframes in enumerate(self.keyframes):
-            for kf_idx, kf in enumerate(keyframes):
-                x = self._time_to_timeline_x(kf.time)
-                dist = abs(x - event.x)
-                if dist < 10 and dist < best_distance:  # 10 pixels de marge
-                    clicked = (layer_idx, kf_idx)
-                    best_distance = dist
-                    break
+        clicked = self._timeline_keyframe_at(event)
 
         # Gestion de la sélection (Ctrl pour multi-sélection)
         if event.state & 0x4:  # Ctrl pressed
@@ -1810,9 +1983,9 @@ class CompositionApp:
         else:
             # Sinon, nouvelle sélection contenant uniquement l'élément cliqué
             if clicked:
-                self.selected_keyframes = {clicked}
+                self.selected_keyframes = KeyframeSelection([clicked])
             else:
-                self.selected_keyframes.clear()
+                self.selected_keyframes = KeyframeSelection()
 
         # Track last clicked keyframe for delete operations
         if clicked:
@@ -1821,60 +1994,75 @@ class CompositionApp:
 
         # Si une keyframe est cliquée, commence le drag
         if clicked:
-            # store direct references to selected keyframe objects and their original times
-            selected_kfs = []
-            for (li, ki) in list(self.selected_keyframes):
-                try:
-                    kf_obj = self.keyframes[li][ki]
-                    selected_kfs.append({'layer': li, 'index': ki, 'kf': kf_obj, 'orig_time': float(kf_obj.time)})
-                except Exception:
-                    # skip invalid references
-                    continue
-
+            # temps d'origine des keyframes sélectionnées, par layer et dans l'ordre des plages
+            sel = self.selected_keyframes
+            layers = []
+            for li in sel.layers():
+                kfs = self.keyframes[li]
+                layers.append({'layer': li,
+                               'orig_times': kfs.rows(sel.ranges(li)).times})
+
+            canvas_x = self.timeline_canvas.canvasx(event.x)
             self._keyframe_drag = {
                 'dragging': True,
-                'start_x': event.x,
-                'start_time': self._timeline_x_to_time(event.x),
-                'selected_kfs': selected_kfs
+                'start_x': canvas_x,
+                'start_time': self._timeline_x_to_time(canvas_x),
+                'layers': layers,
+                # la keyframe cliquée est suivie par son rang dans la sélection de son layer
+                'clicked': (clicked[0], sel.position(clicked))
             }
         else:
-            # nothing to drag
-            self._keyframe_drag = {'dragging': False, 'start_x': 0, 'start_time': 0.0, 'selected_kfs': []}
-        
-        self.redraw_timeline()
+            # nothing to drag : sélection par rectangle depuis ce point
+            self._keyframe_drag = {'dragging': False, 'start_x': 0, 'start_time': 0.0, 'layers': []}
+            c = self.timeline_canvas
+            self._marquee = {
+                'x': c.canvasx(event.x),
+                'y': c.canvasy(event.y),
+                # Ctrl : le rectangle s'ajoute à la sélection existante
+                'base': self.selected_keyframes.copy(),
+                'item': None,
+            }
+
+        self.redraw_scheduler.request('timeline')
 
     def _timeline_mouse_drag(self, event):
+        if self._marquee is not None:
+            self._update_marquee(event)
+            return
         if not self._keyframe_drag.get('dragging'):
             return
 
         # Calcule le delta de temps basé sur la position de la souris
-        current_time = self._timeline_x_to_time(event.x)
+        current_time = self._timeline_x_to_time(self.timeline_canvas.canvasx(event.x))
         start_time = self._keyframe_drag.get('start_time', 0.0)
         delta = current_time - start_time
 
-        # Applique le déplacement relatif sur les objets keyframe stockés
-        for entry in self._keyframe_drag.get('selected_kfs', []):
-            kf_obj = entry.get('kf')
-            orig = entry.get('orig_time', 0.0)
-            if kf_obj is None:
-                continue
-            kf_obj.time = max(0.0, orig + delta)
-
-        # Trie les keyframes par temps
-        for layer_keyframes in self.keyframes:
-            layer_keyframes.sort(key=lambda k: k.time)
-
-        self.redraw_timeline()
-        self.redraw_render()
+        sel = self.selected_keyframes
+        with self.doc.batch():
+            # déplacement groupé : par layer, les plages sélectionnées sont retirées puis
+            # refusionnées à leurs nouveaux temps (un seul passage sur les keyframes du layer)
+            for entry in self._keyframe_drag.get('layers', []):
+                li = entry['layer']
+                times = np.maximum(entry['orig_times'] + delta, 0.0)
+                sel.set_ranges(li, self.doc.retime_keyframes(li, sel.ranges(li), times))
+            li, pos = self._keyframe_drag['clicked']
+            if pos is not None:
+                self.last_selected_object = sel.item_at(li, pos)
 
     def _timeline_mouse_up(self, event):
+        if self._marquee is not None:
+            if self._marquee['item'] is not None:
+                self.timeline_canvas.delete(self._marquee['item'])
+            self._marquee = None
+            if self.selected_keyframes:
+                self.last_selected_type = 'keyframe'
+                self.last_selected_object = next(iter(self.selected_keyframes))
         if self._keyframe_drag.get('dragging'):
             self._keyframe_drag['dragging'] = False
             # clear temporary drag list
-            self._keyframe_drag['selected_kfs'] = []
+            self._keyframe_drag['layers'] = []
             # Les keyframes sont déjà à leur nouvelle position
-            self.redraw_timeline()
-            self.redraw_render()
+            self.redraw_scheduler.request('timeline', 'render')
 
     def _timeline_seek(self, event):
         """Seek instantly to mouse x on timeline and pause playback so the user can resume from there."""
@@ -1889,6 +2077,7 @@ class CompositionApp:
             return
         # set playback time and pause
         self.playback_time = t
+        self.playback_cursor.seek()
         self.is_playing = False
         if getattr(self, 'playback_job', None):
             try:
@@ -1910,8 +2099,7 @@ class CompositionApp:
             self.timecode_var.set(self._format_timecode(self.playback_time))
         except Exception:
             pass
-        self.redraw_timeline()
-        self.redraw_render()
+        self.redraw_scheduler.request('timeline', 'render')
 
     # -------------------------
     # Overlay / tooltip helpers
@@ -1959,20 +2147,13 @@ class CompositionApp:
         """On mouse move over timeline: show overlay when hovering a keyframe."""
         try:
             # find nearest keyframe within threshold
-            nearest = None
-            best_dist = 9999
-            for layer_idx, keyframes in enumerate(self.keyframes):
-                for kf_idx, kf in enumerate(keyframes):
-                    x = self._time_to_timeline_x(kf.time)
-                    dist = abs(x - event.x)
-                    if dist < 10 and dist < best_dist:
-                        nearest = (layer_idx, kf_idx, kf)
-                        best_dist = dist
+            nearest = self._timeline_keyframe_at(event)
             if nearest is None:
                 self._hide_overlay()
                 return
 
-            li, ki, kf = nearest
+            li, ki = nearest
+            kf = self.keyframes[li][ki]
             # gather properties
             try:
                 L = self.layers[li]
@@ -1985,7 +2166,8 @@ class CompositionApp:
                 f"x: {kf.x:.3f}, y: {kf.y:.3f}\n"
                 f"w: {kf.w:.3f}, h: {kf.h:.3f}\n"
                 f"color: {kf.color}, opacity: {kf.opacity}\n"
-                f"rotation: {getattr(kf, 'rotation', 0):.1f}°"
+                f"rotation: {kf.rotation:.1f}°\n"
+                f"easing: {kf.easing or 'default'}"
             )
             # show overlay near pointer
             self._show_overlay(txt, event.x_root + 12, event.y_root + 12)
@@ -1995,6 +2177,7 @@ class CompositionApp:
             except Exception:
                 pass
 
+    @timed('draw_playback_cursor')
     def draw_playback_cursor(self):
         """Draw or update the red playback cursor on the timeline canvas only.
 
@@ -2004,10 +2187,7 @@ class CompositionApp:
         try:
             c = self.timeline_canvas
             # compute mapping same as redraw_timeline
-            width = max(300000, c.winfo_width())
-            # Use same logic as redraw_timeline for consistency
-            total_seconds = max(10.0, self.audio_duration, 7200.0)
-            pixels_per_second = width / total_seconds
+            pixels_per_second = self.timeline_scale.pixels_per_second
             # scrollregion height for cursor
             scrollregion = c.cget('scrollregion')
             if scrollregion:
@@ -2066,58 +2246,28 @@ class CompositionApp:
             return
             
         if self.last_selected_type == 'keyframe':
-            self._delete_keyframe(self.last_selected_object)
+            self._delete_selected_keyframes(self.last_selected_object)
         elif self.last_selected_type == 'layer':
             self._delete_layer(self.last_selected_object)
             
-    def _delete_keyframe(self, target_tuple):
-        """Helper to delete a keyframe and update related state."""
+    def _delete_selected_keyframes(self, target_tuple):
+        """Supprime toutes les keyframes sélectionnées (celle visée doit en faire partie)."""
         if not target_tuple or target_tuple not in self.selected_keyframes:
             return
-            
-        layer_idx, kf_idx = target_tuple
-        if not (0 <= layer_idx < len(self.keyframes)):
-            # remove from selection and exit
-            self.selected_keyframes.discard(target_tuple)
-            if self.last_selected_object == target_tuple:
-                self.last_selected_object = None
-                self.last_selected_type = None
-            return
-            
-        if not (0 <= kf_idx < len(self.keyframes[layer_idx])):
-            # possibly indexes shifted
-            self.selected_keyframes.discard(target_tuple)
-            if self.last_selected_object == target_tuple:
-                self.last_selected_object = None
-                self.last_selected_type = None
-            return
-                
-        # Validation passed, delete keyframe
-        self.keyframes[layer_idx].pop(kf_idx)
-        
-        # rebuild selected_keyframes to account for index shifts in same layer
-        new_sel = set()
-        for (li, ki) in list(self.selected_keyframes):
-            if li != layer_idx:
-                new_sel.add((li, ki))
-            else:
-                if ki == kf_idx:
-                    continue  # removed keyframe
-                elif ki > kf_idx:
-                    new_sel.add((li, ki-1))  # shift down for keyframes after
-                else:
-                    new_sel.add((li, ki))  # keep as is for keyframes before
-        self.selected_keyframes = new_sel
-        
-        # update last selected reference
-        if self.last_selected_object == target_tuple:
-            self.last_selected_object = next(iter(self.selected_keyframes), None)
-            if not self.last_selected_object:
-                self.last_selected_type = None
-                
-        # update UI
-        self.redraw_timeline()
-        self.redraw_render()
+
+        sel = self.selected_keyframes
+        # delete keyframes, plage par plage (the document notifies timeline and render views)
+        with self.doc.batch():
+            for li in sel.layers():
+                if not (0 <= li < len(self.keyframes)):
+                    continue
+                n = len(self.keyframes[li])
+                ranges = [(start, min(stop, n)) for start, stop in sel.ranges(li) if start < n]
+                if ranges:
+                    self.doc.remove_keyframes(li, ranges)
+        self.selected_keyframes = KeyframeSelection()
+        self.last_selected_object = None
+        self.last_selected_type = None
         try:
             self.update_properties_panel()
         except Exception:
@@ -2128,21 +2278,8 @@ class CompositionApp:
         if not isinstance(layer_idx, int) or not (0 <= layer_idx < len(self.layers)):
             return
             
-        # First, remove any keyframes that reference this layer
-        new_selected = set()
-        for li, ki in list(self.selected_keyframes):
-            if li == layer_idx:
-                continue  # skip keyframes from deleted layer
-            elif li > layer_idx:
-                # adjust indices for layers above the deleted one
-                new_selected.add((li-1, ki))
-            else:
-                new_selected.add((li, ki))
-        self.selected_keyframes = new_selected
-        
-        # Remove layer and its keyframes
-        self.layers.pop(layer_idx)
-        self.keyframes.pop(layer_idx)
+        # First, remove any keyframes that reference this layer (layers above shift down)
+        self.selected_keyframes.remove_layer(layer_idx)
         
         # Clear selection state
         if self.selected_index == layer_idx:
@@ -2155,11 +2292,8 @@ class CompositionApp:
             self.last_selected_type = None
             self.last_selected_object = None
         
-        # Update UI
-        self.render_layers_list()
-        self.update_properties_panel()
-        self.redraw_render()
-        self.redraw_timeline()
+        # Remove layer and its keyframes (the document notifies every view)
+        self.doc.remove_layer(layer_idx)
 
     def _duplicate_last_selected_object(self, event=None):
         """Duplicate the last selected object (layer or keyframe).
@@ -2177,7 +2311,7 @@ class CompositionApp:
                 return
         elif self.last_selected_type == 'keyframe':
             try:
-                self._duplicate_keyframe(self.last_selected_object)
+                self._duplicate_selected_keyframes(self.last_selected_object)
             except Exception:
                 return
 
@@ -2200,30 +2334,20 @@ class CompositionApp:
             new_name = f"{orig.name} (copy {counter})"
             counter += 1
         new_layer = Layer(new_name, x_rel=orig.x, y_rel=orig.y, w_rel=orig.w, h_rel=orig.h,
-                          color=orig.color, opacity=orig.opacity, rotation=getattr(orig, 'rotation', 0))
+                          color=orig.color, opacity=orig.opacity, rotation=orig.rotation)
 
         insert_idx = layer_idx + 1
-        self.layers.insert(insert_idx, new_layer)
 
-        # Duplicate keyframes for this layer
-        orig_kfs = self.keyframes[layer_idx]
-        new_kfs = []
-        for kf in orig_kfs:
-            new_kfs.append(Keyframe(kf.time, kf.x, kf.y, kf.w, kf.h, kf.color, kf.opacity, getattr(kf, 'rotation', 0)))
-        self.keyframes.insert(insert_idx, new_kfs)
+        # Duplicate keyframes for this layer (copie des colonnes)
+        new_kfs = self.keyframes[layer_idx].copy()
 
         # Adjust selected_keyframes indices (shift layers after insert_idx)
-        new_sel = set()
-        for li, ki in self.selected_keyframes:
-            if li >= insert_idx:
-                new_sel.add((li + 1, ki))
-            else:
-                new_sel.add((li, ki))
-        self.selected_keyframes = new_sel
+        self.selected_keyframes.insert_layer(insert_idx)
 
         # Select the new layer (use select_layer to update UI consistently)
         print(f"Duplicated layer {layer_idx} -> new at {insert_idx}")
-        self.render_layers_list()
+        # the document notifies the layers list, render and timeline views
+        self.doc.add_layer(new_layer, new_kfs, index=insert_idx)
         try:
             # ensure widgets created
             self.root.update_idletasks()
@@ -2248,9 +2372,6 @@ class CompositionApp:
         except Exception:
             pass
 
-        self.redraw_render()
-        self.redraw_timeline()
-
         # Try a safer scroll to the duplicated item's approximate position
         try:
             if hasattr(self.layers_scroll, '_canvas'):
@@ -2267,17 +2388,14 @@ class CompositionApp:
         except Exception:
             pass
 
-    def _duplicate_keyframe(self, kf_tuple):
-        """Duplicate a single keyframe in its layer.
+    def _duplicate_selected_keyframes(self, kf_tuple):
+        """Duplicate the selected keyframes (or only `kf_tuple` if it is not selected).
 
-        The duplicate will be inserted just after the original (time + small offset if needed).
+        Each duplicate lands just after its original (time + small offset); the duplicates
+        become the new selection.
         """
         if not kf_tuple:
             return
-        if kf_tuple not in self.selected_keyframes:
-            # allow duplicating a single provided tuple even if not in selected set
-            pass
-
         try:
             li, ki = kf_tuple
         except Exception:
@@ -2288,36 +2406,29 @@ class CompositionApp:
         if not (0 <= ki < len(self.keyframes[li])):
             return
 
-        orig = self.keyframes[li][ki]
-        # create duplicate; prefer a tiny time offset to avoid exact overlap
+        sel = self.selected_keyframes
+        if kf_tuple not in sel:
+            # allow duplicating a single provided tuple even if not in selected set
+            sel = KeyframeSelection([kf_tuple])
+        # la copie de la keyframe visée a le même rang qu'elle dans la sélection de son layer
+        target_pos = sel.position(kf_tuple)
+        # prefer a tiny time offset to avoid exact overlap
         offset = 0.1
-        new_time = orig.time + offset
-
-        new_kf = Keyframe(new_time, orig.x, orig.y, orig.w, orig.h, orig.color, orig.opacity, getattr(orig, 'rotation', 0))
 
-        insert_pos = ki + 1
-        self.keyframes[li].insert(insert_pos, new_kf)
-
-        # Shift selected_keyframes indices for same layer where needed
-        new_sel = set()
-        for (lidx, kidx) in self.selected_keyframes:
-            if lidx != li:
-                new_sel.add((lidx, kidx))
-            else:
-                if kidx >= insert_pos:
-                    new_sel.add((lidx, kidx + 1))
-                else:
-                    new_sel.add((lidx, kidx))
+        new_sel = KeyframeSelection()
+        with self.doc.batch():
+            for layer_idx in sel.layers():
+                if not (0 <= layer_idx < len(self.keyframes)):
+                    continue
+                copies = self.keyframes[layer_idx].rows(sel.ranges(layer_idx))
+                copies.times = copies.times + offset
+                # copies déjà triées (mêmes temps décalés) : insertion en un passage
+                new_sel.set_ranges(layer_idx, self.doc.add_keyframes(layer_idx, copies))
 
-        # Select the new duplicated keyframe
-        new_sel.add((li, insert_pos))
+        # Select the new duplicated keyframes
         self.selected_keyframes = new_sel
         self.last_selected_type = 'keyframe'
-        self.last_selected_object = (li, insert_pos)
-
-        # Refresh UI
-        self.redraw_timeline()
-        self.redraw_render()
+        self.last_selected_object = new_sel.item_at(li, target_pos)
         try:
             self.update_properties_panel()
         except Exception:
@@ -2326,13 +2437,14 @@ class CompositionApp:
     def stop_playback(self):
         self.is_playing = False
         self.playback_time = 0.0
+        self.playback_cursor.seek()
         self.play_btn.configure(text="▶ Play")
         self.stop_btn.forget()
         if self.playback_job:
             self.root.after_cancel(self.playback_job)
             self.playback_job = None
-        self.redraw_timeline()
-        self.redraw_render()
+        PERF.end_ticks('playback')
+        self.redraw_scheduler.request('timeline', 'render')
 
 
 
@@ -2343,13 +2455,10 @@ class CompositionApp:
     # Sample content
     # -------------------------
     def create_sample_layers(self):
-        self.layers.append(Layer("Background placeholder", x_rel=0.05, y_rel=0.05, w_rel=0.9, h_rel=0.9, color="#4444aa", opacity=100, rotation=0))
-        self.keyframes.append([])
-        self.layers.append(Layer("Foreground 1", x_rel=0.2, y_rel=0.25, w_rel=0.25, h_rel=0.18, color="#ff5555", opacity=100, rotation=0))
-        self.keyframes.append([])
-        self.layers.append(Layer("Logo", x_rel=0.65, y_rel=0.2, w_rel=0.18, h_rel=0.18, color="#55ff88", opacity=100, rotation=0))
-        self.keyframes.append([])
-        self.render_layers_list()
+        with self.doc.batch():
+            self.doc.add_layer(Layer("Background placeholder", x_rel=0.05, y_rel=0.05, w_rel=0.9, h_rel=0.9, color="#4444aa", opacity=100, rotation=0))
+            self.doc.add_layer(Layer("Foreground 1", x_rel=0.2, y_rel=0.25, w_rel=0.25, h_rel=0.18, color="#ff5555", opacity=100, rotation=0))
+            self.doc.add_layer(Layer("Logo", x_rel=0.65, y_rel=0.2, w_rel=0.18, h_rel=0.18, color="#55ff88", opacity=100, rotation=0))
 
 
 
@@ -0,0 +1,211 @@
+"""
+compositor.py
+Compositeur hors écran (NumPy/PIL) partagé par l'aperçu et l'export de composition_editor.py.
+
+Chaque layer est rastérisé en « sprite » : masque alpha anti-aliasé (forme, taille, rotation
+quantifiée) multiplié par l'opacité, plus sa couleur. Les sprites sont mis en cache par
+(forme, taille, couleur, opacité, rotation quantifiée) ; une frame se résume donc à copier le
+fond puis à fusionner chaque sprite dans un tampon float32 par une opération vectorisée
+(dst += (couleur - dst) * alpha), et l'aperçu n'affiche qu'une seule image. Les layers dont
+la boîte englobante ne touche pas la frame sont écartés avant toute rastérisation.
+"""
+
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from geometry import points_in_rotated_rects
+from keyframe_engine import P_R, P_G, P_B, P_OPACITY
+
+
+ROTATION_STEP = 1.0  # pas de quantification de la rotation des sprites (degrés)
+# au-delà de cette taille (vue très zoomée), un layer est rastérisé directement dans la zone
+# visible au lieu de passer par un sprite (qui pourrait faire des centaines de Mo)
+MAX_SPRITE_PIXELS = 2048 * 2048
+
+# alpha : float32 (h, w, 1) avec l'opacité incluse ; color : float32 (3,)
+Sprite = namedtuple('Sprite', 'alpha color')
+
+
+def styles_from_states(states):
+    """Couleurs (0xRRGGBB) et opacités des layers à partir d'états (dict)."""
+    return [st['rgb'] for st in states], [st.get('opacity', 100) for st in states]
+
+
+def styles_from_values(values):
+    """Idem à partir des tableaux du moteur de keyframes (values (N, P))."""
+    rgb = ((np.rint(values[:, P_R]).astype(np.int64) << 16)
+           | (np.rint(values[:, P_G]).astype(np.int64) << 8)
+           | np.rint(values[:, P_B]).astype(np.int64))
+    return rgb.tolist(), values[:, P_OPACITY].tolist()
+
+
+class Compositor:
+    def __init__(self, rotation_step=ROTATION_STEP, max_bytes=256 * 1024 * 1024):
+        self.rotation_step = rotation_step
+        self.max_bytes = max_bytes
+        self._sprites = OrderedDict()
+        self._bytes = 0
+        self._base_key = None
+        self._base = None
+        self._base_image = None
+        self.hits = 0
+        self.misses = 0
+        self.culled = 0  # layers écartés (hors champ) à la dernière composition
+
+    def clear(self):
+        self._sprites.clear()
+        self._bytes = 0
+        self._base_key = None
+        self._base = None
+        self._base_image = None
+
+    # -------------------------
+    # Sprites
+    # -------------------------
+    def sprite_key(self, shape_type, w, h, rgb, opacity, rotation):
+        w = max(1, int(round(w)))
+        h = max(1, int(round(h)))
+        if shape_type == 'circle':
+            # cercle parfait, invariant par rotation
+            w = h = min(w, h)
+            rotation = 0.0
+        else:
+            rotation = (round(rotation / self.rotation_step) * self.rotation_step) % 360.0
+        return (shape_type, w, h, int(rgb), int(round(opacity)), rotation)
+
+    def sprite(self, key):
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self._sprites.move_to_end(key)
+            self.hits += 1
+            return sprite
+        self.misses += 1
+        shape_type, w, h, rgb, opacity, rotation = key
+        mask = Image.new('L', (w, h), 0)
+        draw = ImageDraw.Draw(mask)
+        if shape_type == 'circle':
+            draw.ellipse([0, 0, w - 1, h - 1], fill=255)
+        else:
+            draw.rectangle([0, 0, w - 1, h - 1], fill=255)
+        if rotation:
+            # même sens que l'aperçu (y vers le bas) : rotation horaire pour un angle positif
+            mask = mask.rotate(-rotation, resample=Image.BICUBIC, expand=True)
+        alpha = np.asarray(mask, dtype=np.float32)[:, :, None] * (max(0, min(opacity, 100)) / (100.0 * 255.0))
+        color = np.array(((rgb >> 16) & 0xFF, (rgb >> 8) & 0xFF, rgb & 0xFF), dtype=np.float32)
+        sprite = Sprite(alpha, color)
+        self._sprites[key] = sprite
+        self._bytes += alpha.nbytes
+        while self._bytes > self.max_bytes and len(self._sprites) > 1:
+            _, old = self._sprites.popitem(last=False)
+            self._bytes -= old.alpha.nbytes
+        return sprite
+
+    # -------------------------
+    # Composition
+    # -------------------------
+    def new_frame(self, background):
+        """Tampon float32 (H, W, 3) initialisé avec l'image de fond (conversion mise en cache)."""
+        key = (id(background), background.size)
+        if key != self._base_key:
+            self._base = np.asarray(background.convert('RGB'), dtype=np.float32)
+            self._base_key = key
+            self._base_image = background  # garde l'image en vie : id() reste valide
+        return self._base.copy()
+
+    @staticmethod
+    def _blend_region(frame, coverage, x0, y0, x1, y1, color, a):
+        """dst = dst * (1 - a) + couleur * a ; `coverage` (alpha accumulé) suit l'opérateur « over »."""
+        region = frame[y0:y1, x0:x1]
+        region += (color - region) * a
+        if coverage is not None:
+            cov = coverage[y0:y1, x0:x1]
+            cov += (1.0 - cov) * a
+
+    def blend(self, frame, sprite, cx, cy, coverage=None):
+        """Fusionne `sprite` centré en (cx, cy) (pixels) dans `frame`, avec découpage aux bords."""
+        sh, sw = sprite.alpha.shape[:2]
+        fh, fw = frame.shape[:2]
+        x0 = int(round(cx - sw / 2.0))
+        y0 = int(round(cy - sh / 2.0))
+        fx0, fy0 = max(x0, 0), max(y0, 0)
+        fx1, fy1 = min(x0 + sw, fw), min(y0 + sh, fh)
+        if fx0 >= fx1 or fy0 >= fy1:
+            return
+        a = sprite.alpha[fy0 - y0:fy1 - y0, fx0 - x0:fx1 - x0]
+        self._blend_region(frame, coverage, fx0, fy0, fx1, fy1, sprite.color, a)
+
+    def composite(self, frame, geom, rgb, opacity, origin=(0, 0), ids=None, coverage=None):
+        """Dessine les layers (tous, ou ceux de `ids`) du dessous vers le dessus.
+
+        geom : geometry.LayerGeometry (pixels) ; origin : position du coin haut-gauche de
+        `frame` dans le repère de `geom`. Avec `coverage` (tampon (H, W, 1) d'alpha), `frame`
+        est traité comme une couleur prémultipliée sur fond transparent.
+        """
+        ox, oy = origin
+        fh, fw = frame.shape[:2]
+        # élimination des layers hors champ (vectorisée, sur les AABB)
+        x0, y0, x1, y1 = geom.bboxes.T
+        keep = (x1 > ox) & (x0 < ox + fw) & (y1 > oy) & (y0 < oy + fh)
+        if ids is not None:
+            keep &= np.isin(np.arange(len(geom)), ids)
+        visible = np.nonzero(keep)[0]
+        self.culled = len(geom) - len(visible)
+        for i in visible.tolist():
+            alpha = opacity[i]
+            if alpha <= 0:
+                continue
+            shape_type = 'circle' if geom.circle[i] else 'rectangle'
+            w, h = geom.w[i], geom.h[i]
+            if w * h > MAX_SPRITE_PIXELS:
+                self.blend_direct(frame, geom, i, rgb[i], alpha, origin, coverage)
+                continue
+            sprite = self.sprite(self.sprite_key(shape_type, w, h, rgb[i], alpha, geom.rotation[i]))
+            self.blend(frame, sprite, geom.cx[i] - ox, geom.cy[i] - oy, coverage)
+        return frame
+
+    def blend_direct(self, frame, geom, i, rgb, opacity, origin=(0, 0), coverage=None):
+        """Rastérise le layer `i` directement (sans sprite) sur la partie de la frame qu'il couvre."""
+        ox, oy = origin
+        fh, fw = frame.shape[:2]
+        bx0, by0, bx1, by1 = geom.bboxes[i]
+        x0, y0 = max(int(np.floor(bx0 - ox)), 0), max(int(np.floor(by0 - oy)), 0)
+        x1, y1 = min(int(np.ceil(bx1 - ox)), fw), min(int(np.ceil(by1 - oy)), fh)
+        if x0 >= x1 or y0 >= y1:
+            return
+        # centres des pixels, dans le repère de la géométrie
+        px = (np.arange(x0, x1) + 0.5 + ox)[None, :]
+        py = (np.arange(y0, y1) + 0.5 + oy)[:, None]
+        inside = points_in_rotated_rects(px, py, geom.cx[i], geom.cy[i], geom.w[i] / 2, geom.h[i] / 2,
+                                         geom.cos[i], geom.sin[i], geom.circle[i:i + 1])
+        a = inside[:, :, None].astype(np.float32) * (max(0, min(opacity, 100)) / 100.0)
+        color = np.array(((rgb >> 16) & 0xFF, (rgb >> 8) & 0xFF, rgb & 0xFF), dtype=np.float32)
+        self._blend_region(frame, coverage, x0, y0, x1, y1, color, a)
+
+    @staticmethod
+    def to_image(frame):
+        return Image.fromarray((frame + 0.5).astype(np.uint8), 'RGB')
+
+    @staticmethod
+    def to_rgba_image(frame, coverage):
+        """Image RGBA à partir d'une couleur prémultipliée et de son alpha."""
+        rgb = np.divide(frame, coverage, out=np.zeros_like(frame), where=coverage > 0)
+        rgba = np.concatenate((rgb, coverage * 255.0), axis=2)
+        return Image.fromarray((rgba + 0.5).astype(np.uint8), 'RGBA')
+
+    def render(self, background, geom, rgb, opacity, origin=(0, 0), ids=None):
+        """Image RGB du fond avec les layers (tous, ou ceux de `ids`) fusionnés."""
+        return self.to_image(self.composite(self.new_frame(background), geom, rgb, opacity, origin, ids))
+
+    def render_rgba(self, size, geom, rgb, opacity, origin=(0, 0), ids=None):
+        """Image RGBA (fond transparent) de taille `size` avec les layers `ids` fusionnés."""
+        w, h = size
+        frame = np.zeros((h, w, 3), dtype=np.float32)
+        coverage = np.zeros((h, w, 1), dtype=np.float32)
+        self.composite(frame, geom, rgb, opacity, origin, ids, coverage)
+        return self.to_rgba_image(frame, coverage)
+
+    def sprite_image(self, sprite):
+        """Image RGBA d'un sprite seul (pour l'afficher comme item de canvas)."""
+        return self.to_rgba_image(sprite.alpha * sprite.color, sprite.alpha)
@@ -0,0 +1,469 @@
+"""
+document_model.py
+Modèle de document de composition_editor.py : layers, keyframes, keyframes de scène et audio.
+
+Toutes les modifications passent par DocumentModel, qui tient des compteurs de révision et
+notifie les vues avec des événements fins (géométrie du layer N, keyframes du layer N,
+liste des layers, piste de scène, audio). Les vues ne repeignent ainsi que ce qui a changé.
+"""
+
+import itertools
+import operator
+from collections import namedtuple
+from contextlib import contextmanager
+
+import numpy as np
+
+from keyframe_engine import KeyframeTrack, SHAPES, pack_color, color_to_hex, shape_code
+
+
+# Types d'événements de modification
+LAYER_GEOMETRY = 'layer_geometry'    # propriétés propres d'un layer (position, taille, couleur, ...)
+LAYER_KEYFRAMES = 'layer_keyframes'  # keyframes d'un layer
+LAYERS = 'layers'                    # ajout, suppression ou réordonnancement de layers
+SCENE = 'scene'                      # keyframes / noms de scène
+AUDIO = 'audio'                      # bande son
+
+ChangeEvent = namedtuple('ChangeEvent', 'kind layer')
+
+
+# identifiants stables des layers (indépendants de leur position dans la liste)
+_layer_uids = itertools.count(1)
+
+
+class Layer:
+    __slots__ = ('name', 'x', 'y', 'w', 'h', 'rgb', 'opacity', 'rotation', 'shape_type', 'uid', 'revision')
+
+    def __init__(self, name, x_rel=0.1, y_rel=0.1, w_rel=0.2, h_rel=0.2, color="#ff0000", opacity=100, rotation=0, shape_type="rectangle"):
+        """
+        Coordinates relative to background image: values between 0 and 1.
+        """
+        self.name = name
+        self.x = x_rel
+        self.y = y_rel
+        self.w = w_rel
+        self.h = h_rel
+        self.color = color
+        self.opacity = opacity  # 0..100
+        self.rotation = rotation  # in degrees
+        self.shape_type = shape_type
+        self.uid = next(_layer_uids)
+        self.revision = 0  # incrémentée à chaque modification du layer ou de ses keyframes
+
+    # couleur stockée compactée (0xRRGGBB) ; la chaîne '#rrggbb' est produite via un cache borné
+    @property
+    def color(self):
+        return color_to_hex(self.rgb)
+
+    @color.setter
+    def color(self, value):
+        self.rgb = pack_color(value)
+
+
+class Keyframe:
+    """Vue légère sur une ligne d'une piste de keyframes (KeyframeList).
+
+    Les valeurs vivent dans les colonnes de la piste ; la vue ne garde que (piste, index)
+    et reste valable jusqu'à la prochaine insertion ou suppression dans cette piste (on
+    suit une keyframe par son index, pas par la vue). Construite directement, la vue porte
+    une piste d'une seule ligne, le temps d'être insérée dans un layer.
+    """
+    __slots__ = ('_track', '_row')
+
+    def __init__(self, time, x, y, w, h, color, opacity, rotation=0, shape_type="rectangle", easing=None, easing_params=None):
+        """
+        easing: courbe du segment qui commence à cette keyframe ('hold', 'linear', 'ease_in',
+        'ease_out', 'ease_in_out', 'step', 'bezier') ; None = mode global `animate`.
+        easing_params: points de contrôle (x1, y1, x2, y2) pour 'bezier', (n,) pour 'step'.
+        """
+        track = KeyframeTrack()
+        for name, dtype in KeyframeTrack.COLUMNS:
+            setattr(track, name, np.zeros(1, dtype=dtype))
+        self._track = track
+        self._row = 0
+        track.times[0] = time
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+        self.color = color
+        self.opacity = opacity
+        self.rotation = rotation
+        self.shape_type = shape_type
+        if easing is not None:
+            track.easing = [(easing, easing_params)]
+
+    @classmethod
+    def _view(cls, track, row):
+        kf = cls.__new__(cls)
+        kf._track = track
+        kf._row = row
+        return kf
+
+    # le temps fixe la place dans la piste : il se change par KeyframeList.retime (DocumentModel.retime_keyframes)
+    @property
+    def time(self):
+        return float(self._track.times[self._row])
+
+    @property
+    def x(self):
+        return float(self._track.x[self._row])
+
+    @x.setter
+    def x(self, value):
+        self._track.x[self._row] = value
+
+    @property
+    def y(self):
+        return float(self._track.y[self._row])
+
+    @y.setter
+    def y(self, value):
+        self._track.y[self._row] = value
+
+    @property
+    def w(self):
+        return float(self._track.w[self._row])
+
+    @w.setter
+    def w(self, value):
+        self._track.w[self._row] = value
+
+    @property
+    def h(self):
+        return float(self._track.h[self._row])
+
+    @h.setter
+    def h(self, value):
+        self._track.h[self._row] = value
+
+    @property
+    def rgb(self):
+        return int(self._track.rgb[self._row])
+
+    @rgb.setter
+    def rgb(self, value):
+        self._track.rgb[self._row] = value
+
+    @property
+    def color(self):
+        return color_to_hex(self.rgb)
+
+    @color.setter
+    def color(self, value):
+        self.rgb = pack_color(value)
+
+    # opacité entière 0..100, comme le curseur du panneau de propriétés
+    @property
+    def opacity(self):
+        return int(round(self._track.opacity[self._row]))
+
+    @opacity.setter
+    def opacity(self, value):
+        self._track.opacity[self._row] = value
+
+    @property
+    def rotation(self):
+        return float(self._track.rotation[self._row])
+
+    @rotation.setter
+    def rotation(self, value):
+        self._track.rotation[self._row] = value
+
+    @property
+    def shape_type(self):
+        return SHAPES[int(self._track.shape[self._row])]
+
+    @shape_type.setter
+    def shape_type(self, value):
+        self._track.shape[self._row] = shape_code(value)
+
+    @property
+    def easing(self):
+        easing = self._track.easing
+        return None if easing is None else easing[self._row][0]
+
+    @easing.setter
+    def easing(self, value):
+        self._set_easing(value, self.easing_params)
+
+    @property
+    def easing_params(self):
+        easing = self._track.easing
+        return None if easing is None else easing[self._row][1]
+
+    @easing_params.setter
+    def easing_params(self, value):
+        self._set_easing(self.easing, value)
+
+    def _set_easing(self, easing, params):
+        track = self._track
+        if track.easing is None:
+            if easing is None and params is None:
+                return
+            track.easing = [(None, None)] * len(track)
+        track.easing[self._row] = (easing, params)
+
+
+class KeyframeList(KeyframeTrack):
+    """Keyframes d'un layer, toujours triées par temps.
+
+    Stockage principal des keyframes : une colonne NumPy par propriété (voir KeyframeTrack),
+    lue directement par le moteur d'évaluation. `kfs[i]` renvoie une vue Keyframe sur la
+    ligne i. Recherche par np.searchsorted ; les insertions, suppressions et déplacements
+    (même groupés) reconstruisent les colonnes en un seul passage vectorisé.
+    """
+    __slots__ = ()
+
+    def __init__(self, keyframes=()):
+        if isinstance(keyframes, KeyframeTrack):
+            self._assign(keyframes)
+        else:
+            super().__init__(keyframes)
+
+    def __iter__(self):
+        return (Keyframe._view(self, i) for i in range(len(self)))
+
+    def __getitem__(self, i):
+        n = len(self)
+        if isinstance(i, slice):
+            return [Keyframe._view(self, k) for k in range(*i.indices(n))]
+        i = operator.index(i)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError('keyframe index out of range')
+        return Keyframe._view(self, i)
+
+    def _assign(self, track):
+        for name, _ in self.COLUMNS:
+            setattr(self, name, getattr(track, name))
+        self.easing = track.easing
+
+    def _select(self, rows):
+        """Nouvelle KeyframeList des lignes `rows` (masque ou tableau d'index), copiées."""
+        out = KeyframeList.__new__(KeyframeList)
+        for name, _ in self.COLUMNS:
+            setattr(out, name, getattr(self, name)[rows])
+        out.easing = None
+        if self.easing is not None:
+            rows = np.flatnonzero(rows) if rows.dtype == bool else rows
+            out.easing = [self.easing[i] for i in rows.tolist()]
+        return out
+
+    def copy(self):
+        return self._select(np.arange(len(self)))
+
+    def rows(self, ranges):
+        """Copie des keyframes des plages d'index [start, stop) (triées, disjointes)."""
+        return self._select(_range_indices(ranges))
+
+    def add(self, kf):
+        """Insère une keyframe à sa place ; retourne son index."""
+        return self.merge([kf])[0][0]
+
+    def range(self, t0, t1):
+        """Plage d'index [start, stop) des keyframes dont le temps est dans [t0, t1]."""
+        return (int(np.searchsorted(self.times, t0, side='left')),
+                int(np.searchsorted(self.times, t1, side='right')))
+
+    def take(self, ranges):
+        """Retire les keyframes des plages d'index [start, stop) (triées, disjointes) ; les
+        retourne (KeyframeList détachée)."""
+        keep = np.ones(len(self), dtype=bool)
+        keep[_range_indices(ranges)] = False
+        taken = self._select(~keep)
+        self._assign(self._select(keep))
+        return taken
+
+    def merge(self, kfs):
+        """Insère des keyframes déjà triées par temps (Keyframe ou KeyframeTrack) en un seul
+        passage ; retourne les plages d'index qu'elles occupent. À temps égal, elles passent
+        après les existantes."""
+        block = kfs if isinstance(kfs, KeyframeTrack) else KeyframeTrack(kfs)
+        m = len(block)
+        if not m:
+            return []
+        n_old = len(self)
+        # index final de chaque nouvelle keyframe
+        pos = np.searchsorted(self.times, block.times, side='right') + np.arange(m)
+        added = np.zeros(n_old + m, dtype=bool)
+        added[pos] = True
+        for name, dtype in self.COLUMNS:
+            col = np.empty(n_old + m, dtype=dtype)
+            col[pos] = getattr(block, name)
+            col[~added] = getattr(self, name)
+            setattr(self, name, col)
+        if self.easing is not None or block.easing is not None:
+            old = iter(self.easing or [(None, None)] * n_old)
+            new = iter(block.easing or [(None, None)] * m)
+            self.easing = [next(new) if a else next(old) for a in added.tolist()]
+        breaks = np.flatnonzero(np.diff(pos) != 1) + 1
+        starts = pos[np.concatenate(([0], breaks))]
+        stops = pos[np.concatenate((breaks - 1, [m - 1]))] + 1
+        return list(zip(starts.tolist(), stops.tolist()))
+
+    def retime(self, ranges, times):
+        """Donne aux keyframes des plages `ranges` les temps `times` (non décroissants, dans
+        l'ordre des plages) ; retourne leurs nouvelles plages d'index."""
+        block = self.take(ranges)
+        block.times = np.asarray(times, dtype=np.float64)
+        return self.merge(block)
+
+    def nearest(self, time, tolerance):
+        """Index de la keyframe la plus proche de `time` à `tolerance` près, ou None."""
+        i = int(np.searchsorted(self.times, time, side='left'))
+        best = None
+        best_dist = tolerance
+        for j in (i - 1, i):
+            if 0 <= j < len(self.times):
+                dist = abs(float(self.times[j]) - time)
+                if dist <= best_dist:
+                    best, best_dist = j, dist
+        return best
+
+
+def _range_indices(ranges):
+    if not ranges:
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate([np.arange(start, stop) for start, stop in ranges])
+
+
+class DocumentModel:
+    def __init__(self):
+        self.layers = []
+        self.keyframes = []  # une KeyframeList par layer
+        self.scene_keyframes = []
+        self.scene_names = {}
+
+        self.audio_waveform = None
+        self.audio_duration = 0.0
+        self.audio_filename = None
+
+        # révisions par piste (la révision propre à chaque layer est Layer.revision)
+        self.revision = 0
+        self.layers_revision = 0
+        self.scene_revision = 0
+        self.audio_revision = 0
+
+        self._listeners = []
+        self._batch_depth = 0
+        self._pending = []
+
+    # -------------------------
+    # Notifications
+    # -------------------------
+    def subscribe(self, callback):
+        """callback(events) reçoit la liste des ChangeEvent d'une modification (ou d'un lot)."""
+        self._listeners.append(callback)
+
+    @contextmanager
+    def batch(self):
+        """Regroupe les événements émis dans le bloc en une seule notification."""
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._flush()
+
+    def _emit(self, kind, layer=None):
+        self.revision += 1
+        if layer is not None and kind in (LAYER_GEOMETRY, LAYER_KEYFRAMES):
+            self.layers[layer].revision += 1
+        elif kind == LAYERS:
+            self.layers_revision += 1
+        elif kind == SCENE:
+            self.scene_revision += 1
+        elif kind == AUDIO:
+            self.audio_revision += 1
+        event = ChangeEvent(kind, layer)
+        if event not in self._pending:
+            self._pending.append(event)
+        if self._batch_depth == 0:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        events, self._pending = self._pending, []
+        for callback in list(self._listeners):
+            callback(events)
+
+    # -------------------------
+    # Layers
+    # -------------------------
+    def add_layer(self, layer, keyframes=None, index=None):
+        """Insère un layer (et ses keyframes) ; retourne son index."""
+        if index is None:
+            index = len(self.layers)
+        self.layers.insert(index, layer)
+        self.keyframes.insert(index, KeyframeList(keyframes if keyframes is not None else ()))
+        self._emit(LAYERS)
+        return index
+
+    def remove_layer(self, idx):
+        self.layers.pop(idx)
+        self.keyframes.pop(idx)
+        self._emit(LAYERS)
+
+    def move_layer(self, src, dst):
+        """Déplace le layer `src` (avec ses keyframes) à la position `dst`."""
+        self.layers.insert(dst, self.layers.pop(src))
+        self.keyframes.insert(dst, self.keyframes.pop(src))
+        self._emit(LAYERS)
+
+    def update_layer(self, idx, **props):
+        """Modifie les propriétés propres d'un layer (x, y, w, h, color, opacity, rotation...)."""
+        L = self.layers[idx]
+        for name, value in props.items():
+            setattr(L, name, value)
+        self._emit(LAYER_GEOMETRY, idx)
+
+    # -------------------------
+    # Keyframes
+    # -------------------------
+    def add_keyframe(self, idx, kf):
+        """Insère une keyframe à sa place dans le layer `idx` ; retourne son index."""
+        pos = self.keyframes[idx].add(kf)
+        self._emit(LAYER_KEYFRAMES, idx)
+        return pos
+
+    def add_keyframes(self, idx, kfs):
+        """Insère des keyframes triées par temps en un seul passage ; retourne leurs plages d'index."""
+        ranges = self.keyframes[idx].merge(kfs)
+        self._emit(LAYER_KEYFRAMES, idx)
+        return ranges
+
+    def retime_keyframes(self, idx, ranges, times):
+        """Change le temps d'un ensemble de keyframes (plages d'index) ; retourne leurs nouvelles plages."""
+        ranges = self.keyframes[idx].retime(ranges, times)
+        self._emit(LAYER_KEYFRAMES, idx)
+        return ranges
+
+    def remove_keyframes(self, idx, ranges):
+        """Retire les keyframes des plages d'index [start, stop) ; les retourne."""
+        kfs = self.keyframes[idx].take(ranges)
+        self._emit(LAYER_KEYFRAMES, idx)
+        return kfs
+
+    def keyframes_changed(self, idx):
+        """À appeler après une modification en place des keyframes d'un layer (easing...)."""
+        self._emit(LAYER_KEYFRAMES, idx)
+
+    # -------------------------
+    # Scènes & audio
+    # -------------------------
+    def add_scene_keyframe(self, time, name):
+        # le nom est rangé sous l'index de création du keyframe de scène
+        self.scene_names[len(self.scene_keyframes)] = name
+        self.scene_keyframes.append(float(time))
+        self.scene_keyframes.sort()
+        self._emit(SCENE)
+
+    def set_audio(self, waveform, duration, filename):
+        self.audio_waveform = waveform
+        self.audio_duration = duration
+        self.audio_filename = filename
+        self._emit(AUDIO)
@@ -0,0 +1,102 @@
+"""
+geometry.py
+Géométrie vectorisée des layers de composition_editor.py (rectangles tournés).
+
+Pour tous les layers à la fois, en tableaux NumPy : centres, tailles, rotation, coins,
+poignée de rotation et boîtes englobantes (AABB). Le rendu, les tests de clic et les
+poignées de manipulation consomment le même objet LayerGeometry, calculé une seule fois
+par frame.
+"""
+
+import numpy as np
+
+from keyframe_engine import P_X, P_Y, P_W, P_H, P_ROTATION, SHAPES
+
+
+ROTATE_HANDLE_OFFSET = 30  # distance entre le bord haut du layer et la poignée de rotation (pixels)
+CORNER_NAMES = ('nw', 'ne', 'se', 'sw')
+_CORNERS = np.array([(-0.5, -0.5), (0.5, -0.5), (0.5, 0.5), (-0.5, 0.5)])
+_CIRCLE = SHAPES.index('circle')
+
+
+def points_in_rotated_rects(x, y, cx, cy, hw, hh, cos_a, sin_a, circle=None):
+    """Masque booléen : le point (x, y) est-il dans chaque rectangle tourné ?
+
+    (cx, cy) centre, (hw, hh) demi-dimensions, rotation (cos_a, sin_a) dans le sens de
+    l'affichage (y vers le bas). Pour les formes où `circle` est vrai, le test porte sur
+    le disque de rayon min(hw, hh).
+    """
+    dx = x - cx
+    dy = y - cy
+    # repère local du rectangle : rotation inverse
+    u = dx * cos_a + dy * sin_a
+    v = dy * cos_a - dx * sin_a
+    inside = (np.abs(u) <= hw) & (np.abs(v) <= hh)
+    if circle is not None and circle.any():
+        r = np.minimum(hw, hh)
+        inside = np.where(circle, dx * dx + dy * dy <= r * r, inside)
+    return inside
+
+
+class LayerGeometry:
+    """Géométrie en pixels de N layers placés dans le rectangle (ox, oy, sx, sy).
+
+    x, y, w, h sont relatifs (0..1) comme dans les états de layer ; rotation en degrés.
+    """
+
+    def __init__(self, x, y, w, h, rotation, circle, ox=0.0, oy=0.0, sx=1.0, sy=1.0):
+        self.w = np.asarray(w, dtype=np.float64) * sx
+        self.h = np.asarray(h, dtype=np.float64) * sy
+        self.cx = ox + np.asarray(x, dtype=np.float64) * sx + self.w / 2
+        self.cy = oy + np.asarray(y, dtype=np.float64) * sy + self.h / 2
+        self.rotation = np.asarray(rotation, dtype=np.float64)
+        self.circle = np.asarray(circle, dtype=bool)
+        rad = np.radians(self.rotation)
+        self.cos = np.cos(rad)
+        self.sin = np.sin(rad)
+
+        # coins (N, 4, 2) dans l'ordre nw, ne, se, sw
+        lx = _CORNERS[None, :, 0] * self.w[:, None]
+        ly = _CORNERS[None, :, 1] * self.h[:, None]
+        c = self.cos[:, None]
+        s = self.sin[:, None]
+        self.corners = np.stack((lx * c - ly * s + self.cx[:, None],
+                                 lx * s + ly * c + self.cy[:, None]), axis=-1)
+
+        # poignée de rotation (N, 2) : au-dessus du centre du bord haut
+        ry = -self.h / 2 - ROTATE_HANDLE_OFFSET
+        self.rotate_handles = np.stack((self.cx - ry * self.sin, self.cy + ry * self.cos), axis=-1)
+
+        # boîtes englobantes (N, 4) : x0, y0, x1, y1
+        ex = np.abs(self.w * self.cos) / 2 + np.abs(self.h * self.sin) / 2
+        ey = np.abs(self.w * self.sin) / 2 + np.abs(self.h * self.cos) / 2
+        self.bboxes = np.stack((self.cx - ex, self.cy - ey, self.cx + ex, self.cy + ey), axis=-1)
+
+    def __len__(self):
+        return len(self.cx)
+
+    @classmethod
+    def from_states(cls, states, ox=0.0, oy=0.0, sx=1.0, sy=1.0):
+        """À partir d'états de layer (dict x, y, w, h, rotation, shape_type)."""
+        return cls([st['x'] for st in states], [st['y'] for st in states],
+                   [st['w'] for st in states], [st['h'] for st in states],
+                   [st.get('rotation', 0) for st in states],
+                   [st.get('shape_type') == 'circle' for st in states], ox, oy, sx, sy)
+
+    @classmethod
+    def from_values(cls, values, shapes, ox=0.0, oy=0.0, sx=1.0, sy=1.0):
+        """À partir des tableaux du moteur de keyframes (values (N, P), shapes (N,))."""
+        return cls(values[:, P_X], values[:, P_Y], values[:, P_W], values[:, P_H],
+                   values[:, P_ROTATION], np.asarray(shapes) == _CIRCLE, ox, oy, sx, sy)
+
+    def contains(self, x, y, ids=None):
+        """Masque des layers (tous, ou ceux de `ids`) qui contiennent le point (x, y)."""
+        if ids is None:
+            return points_in_rotated_rects(x, y, self.cx, self.cy, self.w / 2, self.h / 2,
+                                           self.cos, self.sin, self.circle)
+        return points_in_rotated_rects(x, y, self.cx[ids], self.cy[ids], self.w[ids] / 2, self.h[ids] / 2,
+                                       self.cos[ids], self.sin[ids], self.circle[ids])
+
+    def outline(self, idx):
+        """Coordonnées à plat des 4 coins du layer `idx` (pour un polygone de canvas)."""
+        return self.corners[idx].ravel().tolist()
@@ -0,0 +1,531 @@
+"""
+keyframe_engine.py
+Moteur d'évaluation vectorisé des keyframes pour composition_editor.py.
+
+Les keyframes de chaque layer sont compilées en colonnes NumPy (temps, x, y, w, h,
+RGB compacté, opacité, rotation). Toutes les pistes sont ensuite concaténées avec une
+clé composite (index du layer * span + temps) : un seul `np.searchsorted` retrouve,
+pour chaque layer, la keyframe précédente et la suivante, et l'interpolation se fait
+en une passe sur des tableaux.
+"""
+
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+
+# Colonnes des tableaux d'état retournés par l'évaluation
+PROPS = ('x', 'y', 'w', 'h', 'r', 'g', 'b', 'opacity', 'rotation')
+N_PROPS = len(PROPS)
+P_X, P_Y, P_W, P_H, P_R, P_G, P_B, P_OPACITY, P_ROTATION = range(N_PROPS)
+
+# Types de forme encodés en petits entiers
+SHAPES = ('rectangle', 'circle')
+_SHAPE_CODES = {name: code for code, name in enumerate(SHAPES)}
+
+
+# Courbes d'interpolation (easing) : chaque segment entre deux keyframes utilise la courbe
+# de la keyframe de départ. Les courbes sont précalculées en tables (LUT) de LUT_SIZE + 1
+# échantillons de u dans [0, 1] ; l'évaluation lit la table par interpolation linéaire.
+EASINGS = ('hold', 'linear', 'ease_in', 'ease_out', 'ease_in_out', 'step', 'bezier')
+LUT_SIZE = 256
+DEFAULT_BEZIER = (0.25, 0.1, 0.25, 1.0)
+DEFAULT_STEPS = 4
+
+_LUT_U = np.linspace(0.0, 1.0, LUT_SIZE + 1)
+_BUILTIN_LUTS = {
+    'hold': np.zeros(LUT_SIZE + 1),
+    'linear': _LUT_U.copy(),
+    'ease_in': _LUT_U ** 2,
+    'ease_out': 1.0 - (1.0 - _LUT_U) ** 2,
+    'ease_in_out': _LUT_U * _LUT_U * (3.0 - 2.0 * _LUT_U),
+}
+
+
+def bezier_lut(x1, y1, x2, y2):
+    """LUT d'une courbe de Bézier cubique (0,0)-(x1,y1)-(x2,y2)-(1,1), façon CSS."""
+    s = np.linspace(0.0, 1.0, 8 * LUT_SIZE + 1)
+    a, b, c = 3 * (1 - s) ** 2 * s, 3 * (1 - s) * s ** 2, s ** 3
+    bx = a * x1 + b * x2 + c
+    by = a * y1 + b * y2 + c
+    # x(s) doit être croissant pour être inversé par np.interp
+    bx = np.maximum.accumulate(bx)
+    return np.interp(_LUT_U, bx, by)
+
+
+def steps_lut(n):
+    n = max(1, int(n))
+    return np.minimum(np.floor(_LUT_U * n) / n, 1.0)
+
+
+def easing_lut(easing, params=None):
+    """Table précalculée pour un mode d'easing (voir EASINGS) et ses paramètres éventuels."""
+    if easing == 'bezier':
+        return bezier_lut(*(params or DEFAULT_BEZIER))
+    if easing == 'step':
+        return steps_lut(params[0] if params else DEFAULT_STEPS)
+    return _BUILTIN_LUTS.get(easing, _BUILTIN_LUTS['linear'])
+
+
+class EasingTable:
+    """Regroupe les LUT utilisées par les keyframes ; une ligne par courbe distincte."""
+
+    def __init__(self):
+        self._rows = {}
+        self._luts = []
+
+    def row(self, easing, params=None):
+        key = (easing, tuple(params) if params else None)
+        row = self._rows.get(key)
+        if row is None:
+            row = len(self._luts)
+            self._rows[key] = row
+            self._luts.append(easing_lut(easing, params))
+        return row
+
+    def __len__(self):
+        return len(self._luts)
+
+    def array(self):
+        if not self._luts:
+            return np.zeros((0, LUT_SIZE + 1))
+        return np.stack(self._luts)
+
+
+def apply_easing(luts, rows, alpha):
+    """Applique les courbes `rows` (index de ligne dans `luts`) à `alpha`, en vectorisé."""
+    pos = np.clip(alpha, 0.0, 1.0) * LUT_SIZE
+    k = np.minimum(pos.astype(np.int64), LUT_SIZE - 1)
+    frac = pos - k
+    lo = luts[rows, k]
+    return lo + (luts[rows, k + 1] - lo) * frac
+
+
+def shape_code(shape_type):
+    return _SHAPE_CODES.get(shape_type, 0)
+
+
+@lru_cache(maxsize=4096)
+def pack_color(color):
+    """'#rrggbb' -> entier 0xRRGGBB."""
+    c = color.lstrip('#')
+    return int(c[0:6], 16)
+
+
+@lru_cache(maxsize=4096)
+def color_to_hex(rgb):
+    """Entier 0xRRGGBB -> '#rrggbb' (chaîne utilisable par Tk et PIL), mis en cache."""
+    return f'#{rgb:06x}'
+
+
+def unpack_color(rgb):
+    """Entier 0xRRGGBB (ou tableau d'entiers) -> composantes r, g, b."""
+    return (rgb >> 16) & 0xFF, (rgb >> 8) & 0xFF, rgb & 0xFF
+
+
+# Conversion sRGB <-> lumière linéaire (composantes 0..255)
+_SRGB_TO_LINEAR = np.where(np.arange(256) / 255.0 <= 0.04045,
+                           np.arange(256) / 255.0 / 12.92,
+                           ((np.arange(256) / 255.0 + 0.055) / 1.055) ** 2.4) * 255.0
+
+
+def srgb_to_linear(c):
+    return _SRGB_TO_LINEAR[np.clip(np.rint(c), 0, 255).astype(np.int64)]
+
+
+def linear_to_srgb(c):
+    c = np.clip(c / 255.0, 0.0, 1.0)
+    out = np.where(c <= 0.0031308, c * 12.92, 1.055 * c ** (1.0 / 2.4) - 0.055)
+    return np.rint(out * 255.0)
+
+
+class KeyframeTrack:
+    """Keyframes d'un layer stockées en colonnes, triées par temps.
+
+    C'est aussi le stockage principal des keyframes (document_model.KeyframeList en hérite) :
+    le moteur lit ces colonnes telles quelles, sans en garder de copie par layer.
+    """
+    COLUMNS = (
+        ('times', np.float64), ('x', np.float64), ('y', np.float64),
+        ('w', np.float64), ('h', np.float64), ('rgb', np.uint32),
+        ('opacity', np.float64), ('rotation', np.float64), ('shape', np.int8),
+    )
+    __slots__ = tuple(name for name, _ in COLUMNS) + ('easing',)
+
+    def __init__(self, keyframes=()):
+        kfs = sorted(keyframes, key=lambda k: k.time)
+        n = len(kfs)
+        self.times = np.fromiter((kf.time for kf in kfs), dtype=np.float64, count=n)
+        self.x = np.fromiter((kf.x for kf in kfs), dtype=np.float64, count=n)
+        self.y = np.fromiter((kf.y for kf in kfs), dtype=np.float64, count=n)
+        self.w = np.fromiter((kf.w for kf in kfs), dtype=np.float64, count=n)
+        self.h = np.fromiter((kf.h for kf in kfs), dtype=np.float64, count=n)
+        self.rgb = np.fromiter((kf.rgb for kf in kfs), dtype=np.uint32, count=n)
+        self.opacity = np.fromiter((kf.opacity for kf in kfs), dtype=np.float64, count=n)
+        self.rotation = np.fromiter((kf.rotation for kf in kfs), dtype=np.float64, count=n)
+        self.shape = np.fromiter((shape_code(kf.shape_type) for kf in kfs),
+                                 dtype=np.int8, count=n)
+        # (mode, paramètres) d'easing du segment qui commence à chaque keyframe (mode None =
+        # mode par défaut) ; None pour toute la piste si aucune keyframe n'a d'easing propre (cas courant)
+        self.easing = None
+        if any(kf.easing is not None for kf in kfs):
+            self.easing = [(kf.easing, kf.easing_params) for kf in kfs]
+
+    def __len__(self):
+        return len(self.times)
+
+    def values(self):
+        """Matrice (n, N_PROPS) des valeurs numériques, RGB décompacté."""
+        out = np.empty((len(self.times), N_PROPS), dtype=np.float64)
+        out[:, P_X] = self.x
+        out[:, P_Y] = self.y
+        out[:, P_W] = self.w
+        out[:, P_H] = self.h
+        out[:, P_R], out[:, P_G], out[:, P_B] = unpack_color(self.rgb)
+        out[:, P_OPACITY] = self.opacity
+        out[:, P_ROTATION] = self.rotation
+        return out
+
+
+def layer_base_values(layer):
+    """État propre d'un layer (utilisé quand il n'a aucune keyframe)."""
+    r, g, b = unpack_color(layer.rgb)
+    return (layer.x, layer.y, layer.w, layer.h, r, g, b,
+            layer.opacity, layer.rotation)
+
+
+class KeyframeEngine:
+    """Évalue l'état de tous les layers à un instant donné à partir des pistes en colonnes.
+
+    Le moteur référence la piste en colonnes de chaque layer (la KeyframeList du document,
+    sans copie) ; `invalidate(idx)` marque un layer modifié (ou tous si idx est None, après un
+    ajout/suppression/réordonnancement) et les tableaux concaténés sont refaits au besoin.
+    Avec keyframes=False seul l'état propre du layer est relu, sans reconcaténer les pistes.
+    `default_easing` s'applique aux keyframes sans easing propre ; avec `linear_light`,
+    les couleurs sont interpolées en lumière linéaire plutôt qu'en sRGB.
+    """
+
+    def __init__(self, default_easing='linear', linear_light=False):
+        self.default_easing = default_easing
+        self.linear_light = linear_light
+        self._tracks = []
+        self._base = np.zeros((0, N_PROPS), dtype=np.float64)
+        self._base_shape = np.zeros(0, dtype=np.int8)
+        self._dirty = set()
+        self._dirty_base = set()
+        self._dirty_all = True
+        self._packed = None
+        self._stale = set()      # pistes modifiées à recopier dans les tableaux concaténés
+        self._easings = EasingTable()
+        self._curves = []        # lignes d'easing de chaque piste (None = à recalculer)
+        # incrémenté à chaque recompilation des tableaux concaténés (voir PlaybackCursor)
+        self.generation = 0
+
+    def invalidate(self, idx=None, keyframes=True):
+        if idx is None:
+            self._dirty_all = True
+            self._packed = None
+        elif keyframes:
+            self._dirty.add(idx)
+            self._stale.add(idx)
+            if 0 <= idx < len(self._curves):
+                self._curves[idx] = None
+        else:
+            self._dirty_base.add(idx)
+
+    def sync(self, layers, keyframes):
+        """Reprend les pistes invalidées depuis les listes de layers/keyframes."""
+        if not self._dirty_all and not self._dirty and not self._dirty_base:
+            return
+        n = len(layers)
+        if self._dirty_all or len(self._tracks) != n:
+            self._tracks = [keyframes[i] if i < len(keyframes) else KeyframeTrack() for i in range(n)]
+            self._base = np.array([layer_base_values(L) for L in layers], dtype=np.float64).reshape(n, N_PROPS)
+            self._base_shape = np.array([shape_code(L.shape_type) for L in layers],
+                                        dtype=np.int8)
+            self._easings = EasingTable()
+            self._curves = [None] * n
+            self._packed = None
+        else:
+            for i in self._dirty:
+                if 0 <= i < n:
+                    self._tracks[i] = keyframes[i] if i < len(keyframes) else KeyframeTrack()
+            for i in self._dirty | self._dirty_base:
+                if 0 <= i < n:
+                    self._base[i] = layer_base_values(layers[i])
+                    self._base_shape[i] = shape_code(layers[i].shape_type)
+        self._dirty_all = False
+        self._dirty.clear()
+        self._dirty_base.clear()
+
+    def _track_values(self, track):
+        values = track.values()
+        if self.linear_light:
+            values[:, P_R:P_B + 1] = srgb_to_linear(values[:, P_R:P_B + 1])
+        return values
+
+    def _track_curves(self, i):
+        """Lignes d'easing (dans self._easings) des keyframes de la piste `i`, mises en cache."""
+        curves = self._curves[i]
+        if curves is None:
+            tr = self._tracks[i]
+            if tr.easing is None:
+                curves = np.full(len(tr), self._easings.row(self.default_easing), dtype=np.int64)
+            else:
+                curves = np.fromiter((self._easings.row(mode or self.default_easing, params)
+                                      for mode, params in tr.easing),
+                                     dtype=np.int64, count=len(tr))
+            self._curves[i] = curves
+        return curves
+
+    def _pack(self):
+        """Concatène toutes les pistes avec une clé composite triée (layer, temps).
+
+        Les pistes modifiées depuis (déplacement de keyframes, nombre inchangé) sont recopiées
+        en place dans leur tranche ; seul un changement de nombre de keyframes reconcatène tout.
+        """
+        if self._packed is not None and self._stale and not self._patch(self._packed):
+            self._packed = None
+        if self._packed is not None:
+            return self._packed
+        self._stale.clear()
+        n = len(self._tracks)
+        counts = np.fromiter((len(tr) for tr in self._tracks), dtype=np.int64, count=n)
+        ends = np.cumsum(counts)
+        starts = ends - counts
+        total = int(ends[-1]) if n else 0
+        if total:
+            times = np.concatenate([tr.times for tr in self._tracks])
+            values = np.concatenate([self._track_values(tr) for tr in self._tracks])
+            shapes = np.concatenate([tr.shape for tr in self._tracks])
+            curves = np.concatenate([self._track_curves(i) for i in range(n)])
+            luts = self._easings.array()
+            t_min, span, keys = _composite_keys(times, counts)
+        else:
+            times = np.zeros(0)
+            values = np.zeros((0, N_PROPS))
+            shapes = np.zeros(0, dtype=np.int8)
+            curves = np.zeros(0, dtype=np.int64)
+            luts = np.zeros((0, LUT_SIZE + 1))
+            keys = np.zeros(0)
+            t_min, span = 0.0, 4.0
+        self.generation += 1
+        self._packed = {
+            'starts': starts, 'ends': ends, 'times': times, 'values': values,
+            'shapes': shapes, 'keys': keys, 't_min': t_min, 'span': span,
+            'curves': curves, 'luts': luts,
+        }
+        return self._packed
+
+    def _patch(self, p):
+        """Recopie les pistes de self._stale dans leurs tranches de `p` ; False si l'une
+        d'elles a changé de nombre de keyframes (il faut alors tout reconcaténer)."""
+        n = len(self._tracks)
+        if len(p['starts']) != n:
+            return False
+        stale = [i for i in self._stale if 0 <= i < n]
+        if any(len(self._tracks[i]) != p['ends'][i] - p['starts'][i] for i in stale):
+            return False
+        t_max = p['t_min'] + p['span'] - 4.0
+        rekey = False
+        for i in stale:
+            start, end = int(p['starts'][i]), int(p['ends'][i])
+            if start == end:
+                continue
+            tr = self._tracks[i]
+            p['times'][start:end] = tr.times
+            p['values'][start:end] = self._track_values(tr)
+            p['shapes'][start:end] = tr.shape
+            p['curves'][start:end] = self._track_curves(i)
+            if tr.times[0] < p['t_min'] or tr.times[-1] > t_max:
+                rekey = True
+            else:
+                p['keys'][start:end] = tr.times - p['t_min'] + 1.0 + i * p['span']
+        if rekey:
+            # temps hors de l'intervalle couvert : toutes les clés sont recalculées (vectorisé)
+            p['t_min'], p['span'], p['keys'] = _composite_keys(p['times'], p['ends'] - p['starts'])
+        if len(self._easings) != len(p['luts']):
+            p['luts'] = self._easings.array()
+        self._stale.clear()
+        self.generation += 1
+        return True
+
+    def evaluate(self, time, indices=None):
+        """État des layers à l'instant `time`.
+
+        Retourne (values, shapes) : values est un tableau (n_layers, N_PROPS) dans l'ordre
+        de PROPS, shapes un tableau de codes de forme (voir SHAPES).
+        """
+        values, shapes = self.evaluate_many((time,), indices=indices)
+        return values[:, 0], shapes[:, 0]
+
+    def evaluate_many(self, times, indices=None):
+        """État des layers pour plusieurs instants en un seul appel.
+
+        Retourne (values, shapes) de formes (n_layers, n_times, N_PROPS) et (n_layers, n_times).
+        """
+        p = self._pack()
+        times = np.asarray(times, dtype=np.float64).ravel()
+        layer_idx = self._layer_indices(indices)
+        if not len(p['keys']) or not len(layer_idx) or not len(times):
+            return self._interpolate(p, layer_idx, times, None)
+        nxt = self._search(p, layer_idx, times)
+        return self._interpolate(p, layer_idx, times, nxt)
+
+    def _layer_indices(self, indices):
+        if indices is None:
+            return np.arange(len(self._tracks))
+        return np.asarray(indices, dtype=np.int64)
+
+    def _query_keys(self, p, layer_idx, times):
+        local = np.clip(times - p['t_min'] + 1.0, 0.5, p['span'] - 2.0)
+        return layer_idx[:, None] * p['span'] + local[None, :]
+
+    def _search(self, p, layer_idx, times):
+        """Recherche binaire : index de la première keyframe strictement après chaque instant."""
+        q = self._query_keys(p, layer_idx, times)
+        return np.searchsorted(p['keys'], q.ravel(), side='right').reshape(q.shape)
+
+    def _interpolate(self, p, layer_idx, times, nxt):
+        """Interpole entre les keyframes encadrantes ; `nxt` vient de _search (ou du curseur)."""
+        n_layers, n_times = len(layer_idx), len(times)
+        base = np.broadcast_to(self._base[layer_idx][:, None, :], (n_layers, n_times, N_PROPS))
+        base_shape = np.broadcast_to(self._base_shape[layer_idx][:, None], (n_layers, n_times))
+        if nxt is None:
+            return base.copy(), base_shape.copy()
+
+        starts = p['starts'][layer_idx][:, None]
+        ends = p['ends'][layer_idx][:, None]
+        prv = nxt - 1
+        has_prev = prv >= starts
+        has_next = nxt < ends
+        has_any = np.broadcast_to(ends > starts, (n_layers, n_times))
+
+        last = len(p['keys']) - 1
+        i0 = np.clip(np.where(has_prev, prv, nxt), 0, last)
+        i1 = np.clip(np.where(has_next, nxt, prv), 0, last)
+        v0 = p['values'][i0]
+        both = has_prev & has_next
+        if both.any():
+            v1 = p['values'][i1]
+            t0 = p['times'][i0]
+            dt = p['times'][i1] - t0
+            alpha = np.where(both & (dt > 0), (times[None, :] - t0) / np.where(dt > 0, dt, 1.0), 0.0)
+            alpha = apply_easing(p['luts'], p['curves'][i0], alpha)
+            vals = v0 + (v1 - v0) * alpha[..., None]
+        else:
+            vals = v0
+        if self.linear_light:
+            vals[..., P_R:P_B + 1] = linear_to_srgb(vals[..., P_R:P_B + 1])
+        vals = np.where(has_any[..., None], vals, base)
+        shapes = np.where(has_any, p['shapes'][i0], base_shape)
+        return vals, shapes
+
+
+def _composite_keys(times, counts):
+    """(t_min, span, clés) : clé = temps local dans [1, span - 3] + index du layer * span,
+    si bien que les pistes concaténées ne se chevauchent jamais."""
+    t_min = float(times.min())
+    span = float(times.max()) - t_min + 4.0
+    owner = np.repeat(np.arange(len(counts), dtype=np.float64), counts)
+    return t_min, span, times - t_min + 1.0 + owner * span
+
+
+class PlaybackCursor:
+    """Curseur de lecture monotone : garde l'index de segment de chaque layer.
+
+    Tant que le temps avance, chaque appel ne fait qu'avancer les index des layers dont
+    on a franchi une keyframe (coût amorti constant par tick). Un retour en arrière, un
+    `seek()` ou une recompilation du moteur (keyframes éditées) relance une recherche binaire.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._generation = None
+        self._time = None
+        self._next = None
+
+    def seek(self):
+        """À appeler lors d'un saut dans la timeline : la prochaine évaluation refait une recherche."""
+        self._generation = None
+
+    def evaluate(self, time):
+        """Comme KeyframeEngine.evaluate pour tous les layers, avec recherche incrémentale."""
+        engine = self.engine
+        p = engine._pack()
+        times = np.array([float(time)], dtype=np.float64)
+        layer_idx = engine._layer_indices(None)
+        if not len(p['keys']) or not len(layer_idx):
+            self._generation = None
+            values, shapes = engine._interpolate(p, layer_idx, times, None)
+            return values[:, 0], shapes[:, 0]
+
+        if (self._generation != engine.generation or self._time is None
+                or time < self._time or len(self._next) != len(layer_idx)):
+            nxt = engine._search(p, layer_idx, times)[:, 0]
+        else:
+            nxt = self._next
+            q = engine._query_keys(p, layer_idx, times)[:, 0]
+            ends = p['ends']
+            last = len(p['keys']) - 1
+            while True:
+                # avance les layers dont la keyframe suivante est maintenant dépassée
+                step = (nxt < ends) & (p['keys'][np.minimum(nxt, last)] <= q)
+                if not step.any():
+                    break
+                nxt = nxt + step
+        self._next = nxt
+        self._time = time
+        self._generation = engine.generation
+        values, shapes = engine._interpolate(p, layer_idx, times, nxt[:, None])
+        return values[:, 0], shapes[:, 0]
+
+
+def state_from_values(values, shape):
+    """Convertit une ligne de valeurs évaluées en dict d'état (format historique).
+
+    La couleur y est l'entier 0xRRGGBB ('rgb'), utilisé tel quel par le compositeur ; la
+    chaîne '#rrggbb' n'est produite (color_to_hex) que pour l'interface.
+    """
+    rgb = (int(values[P_R]) << 16) | (int(values[P_G]) << 8) | int(values[P_B])
+    return {
+        'x': float(values[P_X]), 'y': float(values[P_Y]),
+        'w': float(values[P_W]), 'h': float(values[P_H]),
+        'rgb': rgb,
+        'opacity': int(values[P_OPACITY]),
+        'rotation': float(values[P_ROTATION]),
+        'shape_type': SHAPES[int(shape)],
+    }
+
+
+class LayerStateCache:
+    """Cache LRU des états de layers, indexé par (uid du layer, révision, numéro de frame).
+
+    Une édition incrémente la révision du layer touché : ses anciennes entrées ne sont plus
+    jamais lues et finissent évincées, les autres layers restent servis depuis le cache.
+    """
+
+    def __init__(self, maxsize=16384):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        state = self._entries.get(key)
+        if state is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return state
+
+    def put(self, key, state):
+        self._entries[key] = state
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
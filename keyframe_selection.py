@@ -0,0 +1,157 @@
+"""
+keyframe_selection.py
+Sélection de keyframes de la timeline de composition_editor.py.
+
+Les keyframes d'un layer étant triées par temps, une sélection par rectangle (ou un
+ensemble de keyframes voisines) est une plage d'index contiguë : la sélection est donc
+rangée par layer sous forme de plages [start, stop) triées et disjointes, au lieu d'un
+tuple (layer, index) par keyframe. Les opérations groupées (déplacement, suppression,
+duplication) consomment directement ces plages ; l'itération et `in` sur des tuples
+(layer, index) restent possibles pour le code qui traite les keyframes une à une.
+"""
+
+import bisect
+
+
+def _normalize(ranges):
+    """Trie et fusionne des plages [start, stop) qui se chevauchent ou se touchent."""
+    out = []
+    for start, stop in sorted(r for r in ranges if r[1] > r[0]):
+        if out and start <= out[-1][1]:
+            if stop > out[-1][1]:
+                out[-1] = (out[-1][0], stop)
+        else:
+            out.append((start, stop))
+    return out
+
+
+class KeyframeSelection:
+    __slots__ = ('_ranges',)
+
+    def __init__(self, items=()):
+        self._ranges = {}  # layer -> [(start, stop), ...]
+        for item in items:
+            self.add(item)
+
+    def copy(self):
+        sel = KeyframeSelection()
+        sel._ranges = {li: list(r) for li, r in self._ranges.items()}
+        return sel
+
+    # -------------------------
+    # Lecture
+    # -------------------------
+    def __len__(self):
+        return sum(stop - start for ranges in self._ranges.values() for start, stop in ranges)
+
+    def __bool__(self):
+        return bool(self._ranges)
+
+    def __iter__(self):
+        for li in sorted(self._ranges):
+            for start, stop in self._ranges[li]:
+                for ki in range(start, stop):
+                    yield li, ki
+
+    def __contains__(self, item):
+        li, ki = item
+        ranges = self._ranges.get(li)
+        if not ranges:
+            return False
+        i = bisect.bisect_right(ranges, (ki, float('inf'))) - 1
+        return i >= 0 and ranges[i][0] <= ki < ranges[i][1]
+
+    def layers(self):
+        return sorted(self._ranges)
+
+    def ranges(self, li):
+        """Plages [start, stop) sélectionnées dans le layer `li` (à ne pas modifier)."""
+        return self._ranges.get(li, [])
+
+    def position(self, item):
+        """Rang de `item` parmi les keyframes sélectionnées de son layer, ou None."""
+        li, ki = item
+        pos = 0
+        for start, stop in self._ranges.get(li, ()):
+            if ki < start:
+                break
+            if ki < stop:
+                return pos + ki - start
+            pos += stop - start
+        return None
+
+    def item_at(self, li, pos):
+        """Inverse de position() : (layer, index) de la `pos`-ième keyframe sélectionnée du layer."""
+        for start, stop in self._ranges.get(li, ()):
+            if pos < stop - start:
+                return li, start + pos
+            pos -= stop - start
+        return None
+
+    # -------------------------
+    # Modification
+    # -------------------------
+    def set_ranges(self, li, ranges):
+        ranges = _normalize(ranges)
+        if ranges:
+            self._ranges[li] = ranges
+        else:
+            self._ranges.pop(li, None)
+
+    def add_range(self, li, start, stop):
+        self.set_ranges(li, self.ranges(li) + [(start, stop)])
+
+    def add(self, item):
+        li, ki = item
+        self.add_range(li, ki, ki + 1)
+
+    def discard(self, item):
+        li, ki = item
+        if item not in self:
+            return
+        ranges = []
+        for start, stop in self._ranges[li]:
+            if start <= ki < stop:
+                ranges.extend(((start, ki), (ki + 1, stop)))
+            else:
+                ranges.append((start, stop))
+        self.set_ranges(li, ranges)
+
+    def remove(self, item):
+        if item not in self:
+            raise KeyError(item)
+        self.discard(item)
+
+    def clear(self):
+        self._ranges.clear()
+
+    # -------------------------
+    # Suivi des index (insertions / suppressions)
+    # -------------------------
+    def shift(self, li, pos, delta):
+        """Suit les index du layer `li` après `delta` keyframes insérées à `pos` (delta > 0) ou
+        retirées à partir de `pos` (delta < 0) ; les keyframes insérées ne sont pas sélectionnées."""
+        ranges = self._ranges.get(li)
+        if not ranges:
+            return
+        shifted = []
+        for start, stop in ranges:
+            if delta > 0:
+                if stop <= pos:
+                    shifted.append((start, stop))
+                elif start >= pos:
+                    shifted.append((start + delta, stop + delta))
+                else:
+                    shifted.extend(((start, pos), (pos + delta, stop + delta)))
+            else:
+                # index retirés : [pos, pos - delta)
+                shifted.append(tuple(i if i <= pos else max(pos, i + delta) for i in (start, stop)))
+        self.set_ranges(li, shifted)
+
+    def remove_layer(self, li):
+        """Le layer `li` est supprimé : sa sélection disparaît, les layers suivants descendent."""
+        self._ranges = {(l - 1 if l > li else l): r for l, r in self._ranges.items() if l != li}
+
+    def insert_layer(self, li):
+        """Un layer est inséré à l'index `li` : les layers à partir de `li` montent."""
+        self._ranges = {(l + 1 if l >= li else l): r for l, r in self._ranges.items()}
@@ -0,0 +1,183 @@
+"""
+perf_monitor.py
+Mesures de performance de la boucle de rendu de composition_editor.py.
+
+Des « spans » chronométrés (redraw_render, redraw_timeline, calcul d'état des layers,
+redimensionnement du fond, curseur de lecture...) sont rangés dans une fenêtre glissante
+par nom ; on en tire p50 / p95 / max. S'y ajoutent des compteurs (items de canvas, ticks
+de lecture manqués). Désactivé par défaut : activé par le menu Affichage ou par la
+variable d'environnement WANDRILLE_PERF=1. Quand il est actif, un résumé est écrit
+périodiquement sur le logger « wandrille.perf ».
+
+Usage :
+    with PERF.span('redraw_render'):
+        ...
+
+    @timed('redraw_timeline')
+    def redraw_timeline(self): ...
+"""
+
+import functools
+import logging
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+
+ENV_VAR = 'WANDRILLE_PERF'
+WINDOW = 240            # mesures conservées par span
+LOG_INTERVAL_S = 5.0    # période du résumé écrit sur le logger
+DROP_FACTOR = 1.5       # un intervalle de lecture > 1.5 x la période compte des ticks manqués
+
+logger = logging.getLogger('wandrille.perf')
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('monitor', 'name', 'start')
+
+    def __init__(self, monitor, name):
+        self.monitor = monitor
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.monitor.record(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class PerfMonitor:
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.enabled = False
+        self._samples = {}
+        self.counters = {}
+        self._last_tick = {}
+        self._last_log = 0.0
+
+    def set_enabled(self, enabled):
+        self.enabled = bool(enabled)
+        if self.enabled:
+            self._last_log = time.perf_counter()
+            # sans configuration de logging par l'application, le résumé va sur stderr
+            if not logger.handlers and not logging.getLogger().handlers:
+                handler = logging.StreamHandler()
+                handler.setFormatter(logging.Formatter('[perf] %(message)s'))
+                logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+        else:
+            self._last_tick.clear()
+
+    def reset(self):
+        self._samples.clear()
+        self.counters.clear()
+        self._last_tick.clear()
+
+    # -------------------------
+    # Mesures
+    # -------------------------
+    def span(self, name):
+        """Context manager chronométrant `name` (sans effet si le moniteur est désactivé)."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name, ms):
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples[name] = deque(maxlen=self.window)
+        samples.append(ms)
+
+    def count(self, name, value):
+        """Fixe la valeur d'un compteur (ex. nombre d'items d'un canvas)."""
+        if self.enabled:
+            self.counters[name] = value
+
+    def tick(self, name, period_ms):
+        """Tick d'une boucle périodique : compte les ticks manqués d'après l'intervalle réel."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        last = self._last_tick.get(name)
+        self._last_tick[name] = now
+        if last is None:
+            return
+        interval = (now - last) * 1000
+        self.record(name + '_interval', interval)
+        key = name + '_dropped'
+        self.counters.setdefault(key, 0)
+        if interval > period_ms * DROP_FACTOR:
+            self.counters[key] += int(round(interval / period_ms)) - 1
+
+    def end_ticks(self, name):
+        """La boucle s'arrête : le prochain tick ne sera pas comparé à celui-ci."""
+        self._last_tick.pop(name, None)
+
+    # -------------------------
+    # Résultats
+    # -------------------------
+    def stats(self, name):
+        """(p50, p95, max, nombre de mesures) du span `name`, ou None."""
+        samples = self._samples.get(name)
+        if not samples:
+            return None
+        a = np.fromiter(samples, dtype=np.float64, count=len(samples))
+        p50, p95 = np.percentile(a, (50, 95))
+        return float(p50), float(p95), float(a.max()), len(a)
+
+    def summary_lines(self):
+        lines = []
+        for name in sorted(self._samples):
+            p50, p95, mx, n = self.stats(name)
+            lines.append(f"{name:<28} p50 {p50:6.2f}  p95 {p95:6.2f}  max {mx:7.2f} ms  (n={n})")
+        for name in sorted(self.counters):
+            lines.append(f"{name:<28} {self.counters[name]}")
+        return lines
+
+    def maybe_log(self):
+        """Écrit le résumé sur le logger si LOG_INTERVAL_S s'est écoulé depuis le dernier."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if now - self._last_log < LOG_INTERVAL_S:
+            return
+        self._last_log = now
+        lines = self.summary_lines()
+        if lines:
+            logger.info("\n  ".join(["render loop:"] + lines))
+
+
+PERF = PerfMonitor()
+if os.environ.get(ENV_VAR, '').strip().lower() in ('1', 'true', 'yes', 'on'):
+    PERF.set_enabled(True)
+
+
+def timed(name):
+    """Décorateur : chronomètre chaque appel de la fonction dans le span `name` de PERF."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kw):
+            if not PERF.enabled:
+                return func(*args, **kw)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kw)
+            finally:
+                PERF.record(name, (time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorator
@@ -0,0 +1,119 @@
+"""
+redraw_scheduler.py
+Ordonnanceur de rafraîchissement des vues de composition_editor.py.
+
+Les gestionnaires d'événements ne repeignent plus directement : ils marquent des vues
+« sales » (request). Un seul flush est programmé (after_idle, ou after s'il faut attendre
+la frame suivante) et toutes les demandes arrivées entre-temps sont fusionnées : au plus un
+rafraîchissement par frame d'affichage. Si un flush dépasse le budget de temps de la frame,
+les vues restantes sont reportées à la frame suivante pour laisser Tk traiter les entrées.
+request_throttled limite en plus la fréquence d'une vue secondaire (panneau de propriétés
+pendant un drag).
+"""
+
+import time
+
+
+class RedrawScheduler:
+    def __init__(self, root, fps=60, budget_ms=12.0):
+        self.root = root
+        self.frame_ms = 1000.0 / fps
+        self.budget_ms = budget_ms
+        self._views = {}   # nom -> callback, dans l'ordre de priorité (ordre d'enregistrement)
+        self._dirty = set()
+        self._carry = []   # vues reportées faute de budget
+        self._job = None
+        self._last_flush = 0.0
+        self._last_run = {}        # nom -> instant du dernier rafraîchissement
+        self._throttle_jobs = {}   # nom -> job after() d'une demande limitée en fréquence
+        # compteurs
+        self.requests = 0        # demandes reçues
+        self.coalesced = 0       # demandes fusionnées avec une demande déjà en attente
+        self.flushes = 0         # flushes effectués
+        self.over_budget = 0     # flushes ayant dépassé le budget
+        self.deferred = 0        # vues reportées à la frame suivante faute de budget
+        self.last_flush_ms = 0.0
+
+    def register(self, name, callback):
+        self._views[name] = callback
+
+    def request(self, *names):
+        """Marque les vues `names` à rafraîchir à la prochaine frame."""
+        for name in names:
+            self.requests += 1
+            if name in self._dirty:
+                self.coalesced += 1
+            else:
+                self._dirty.add(name)
+        self._schedule()
+
+    def request_throttled(self, name, interval_ms):
+        """Comme request(), mais au plus une fois toutes les `interval_ms` millisecondes pour cette vue."""
+        if name in self._throttle_jobs:
+            self.requests += 1
+            self.coalesced += 1
+            return
+        wait = interval_ms - (time.perf_counter() - self._last_run.get(name, 0.0)) * 1000
+        if wait <= 0:
+            self.request(name)
+            return
+        self.requests += 1
+        self._throttle_jobs[name] = self.root.after(int(wait) + 1, self._run_throttled, name)
+
+    def _run_throttled(self, name):
+        self._throttle_jobs.pop(name, None)
+        self.request(name)
+
+    def _schedule(self):
+        if self._job is not None or not self._dirty:
+            return
+        wait = self.frame_ms - (time.perf_counter() - self._last_flush) * 1000
+        if wait > 1:
+            self._job = self.root.after(int(wait), self._run)
+        else:
+            self._job = self.root.after_idle(self._run)
+
+    def _run(self):
+        self._job = None
+        self.flush()
+
+    def flush(self):
+        """Rafraîchit les vues sales (par priorité) dans la limite du budget de la frame."""
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+        start = time.perf_counter()
+        self._last_flush = start
+        self.flushes += 1
+        # les vues reportées au flush précédent passent en premier (pas de famine)
+        order = self._carry + [name for name in self._views if name not in self._carry]
+        self._carry = []
+        try:
+            for name in order:
+                if name not in self._dirty:
+                    continue
+                # au moins une vue par flush, puis on s'arrête si le budget est épuisé
+                if (time.perf_counter() - start) * 1000 > self.budget_ms:
+                    self.deferred += sum(1 for n in order if n in self._dirty)
+                    break
+                self._dirty.discard(name)
+                self._last_run[name] = time.perf_counter()
+                self._views[name]()
+        finally:
+            # vues non rafraîchies (budget épuisé ou exception d'un callback) : elles restent
+            # sales et passent en tête du flush suivant, qui est reprogrammé dans tous les cas
+            self._carry = [n for n in order if n in self._dirty]
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+            if self.last_flush_ms > self.budget_ms:
+                self.over_budget += 1
+            self._schedule()
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'coalesced': self.coalesced,
+            'flushes': self.flushes,
+            'over_budget': self.over_budget,
+            'deferred': self.deferred,
+            'last_flush_ms': self.last_flush_ms,
+        }
@@ -0,0 +1,191 @@
+"""
+render_scene.py
+Scène « retenue » du canvas de rendu de composition_editor.py.
+
+Les items du canvas sont conservés d'un redraw à l'autre : une frame ne fait que des
+`coords()` et, si besoin, des `itemconfigure()`. L'image de la frame (fond et layers
+fusionnés par compositor.py) est un seul item dont la PhotoImage est réutilisée tant que
+la taille ne change pas ; la bordure de sélection et les poignées sont des items
+permanents, masqués quand ils ne servent pas.
+
+Pendant un drag, la frame ne contient que les layers situés sous le layer manipulé ; celui-ci
+est un item image à part (son sprite RGBA), surmonté d'une image RGBA des layers du dessus.
+Chaque mouvement ne touche alors que cet item et les poignées.
+"""
+
+from PIL import ImageTk
+
+HANDLE_SIZE = 8
+ROTATE_HANDLE_RADIUS = 6
+
+
+class RenderScene:
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self._reset()
+
+    def _reset(self):
+        self._restack = False
+        self._frame_item = None
+        self._frame_photo = None
+        self._frame_hidden = False
+        self._message_item = None
+        self._sprite_item = None
+        self._sprite_key = None
+        self._sprite_photo = None
+        self._overlay_item = None
+        self._overlay_photo = None
+        self._selection_item = None
+        self._corner_items = []
+        self._rotate_item = None
+        self._overlay_visible = False
+        self._hud_item = None
+        # compteurs (items créés / supprimés depuis le début)
+        self.created = 0
+        self.deleted = 0
+
+    def clear(self):
+        self.canvas.delete("all")
+        self._reset()
+
+    def _create(self, factory, *args, **kw):
+        self.created += 1
+        return factory(*args, **kw)
+
+    def _delete(self, item):
+        self.deleted += 1
+        self.canvas.delete(item)
+
+    # -------------------------
+    # Frame, message, sélection
+    # -------------------------
+    def set_frame(self, image, x, y):
+        """Affiche l'image PIL `image` (frame composée) avec son coin haut-gauche en (x, y)."""
+        c = self.canvas
+        if self._message_item is not None:
+            self._delete(self._message_item)
+            self._message_item = None
+        photo = self._frame_photo
+        if photo is not None and (photo.width(), photo.height()) == image.size:
+            # même taille : on recopie les pixels dans la PhotoImage existante
+            photo.paste(image)
+        else:
+            photo = self._frame_photo = ImageTk.PhotoImage(image)
+            if self._frame_item is not None:
+                c.itemconfigure(self._frame_item, image=photo)
+        if self._frame_item is None:
+            self._frame_item = self._create(c.create_image, x, y, anchor="nw", image=photo, tags="frame")
+            self._restack = True
+        else:
+            c.coords(self._frame_item, x, y)
+        if self._frame_hidden:
+            c.itemconfigure(self._frame_item, state="normal")
+            self._frame_hidden = False
+
+    def hide_frame(self):
+        """Masque l'image de la frame (image de fond entièrement hors champ)."""
+        if self._frame_item is not None and not self._frame_hidden:
+            self.canvas.itemconfigure(self._frame_item, state="hidden")
+            self._frame_hidden = True
+
+    def set_sprite(self, key, make_image, x, y):
+        """Item image du layer manipulé ; l'image n'est reconstruite (make_image()) que si `key` change."""
+        c = self.canvas
+        if key != self._sprite_key:
+            self._sprite_photo = ImageTk.PhotoImage(make_image())
+            self._sprite_key = key
+            if self._sprite_item is not None:
+                c.itemconfigure(self._sprite_item, image=self._sprite_photo)
+        if self._sprite_item is None:
+            self._sprite_item = self._create(c.create_image, x, y, anchor="nw", image=self._sprite_photo,
+                                             tags="drag_sprite")
+            self._restack = True
+        else:
+            c.coords(self._sprite_item, x, y)
+
+    def set_overlay(self, image, x, y):
+        """Image RGBA des layers situés au-dessus du layer manipulé."""
+        c = self.canvas
+        self._overlay_photo = ImageTk.PhotoImage(image)
+        if self._overlay_item is None:
+            self._overlay_item = self._create(c.create_image, x, y, anchor="nw", image=self._overlay_photo,
+                                              tags="drag_overlay")
+            self._restack = True
+        else:
+            c.itemconfigure(self._overlay_item, image=self._overlay_photo)
+            c.coords(self._overlay_item, x, y)
+
+    def end_drag(self):
+        """Supprime les items propres au drag (sprite et layers du dessus)."""
+        for item in (self._sprite_item, self._overlay_item):
+            if item is not None:
+                self._delete(item)
+        self._sprite_item = self._overlay_item = None
+        self._sprite_key = self._sprite_photo = self._overlay_photo = None
+
+    def set_hud(self, text, x=8, y=8):
+        """Texte des mesures de performance, au-dessus de tout ; text=None le supprime."""
+        c = self.canvas
+        if text is None:
+            if self._hud_item is not None:
+                self._delete(self._hud_item)
+                self._hud_item = None
+            return
+        if self._hud_item is None:
+            self._hud_item = self._create(c.create_text, x, y, text=text, anchor="nw", fill="#FFFF66",
+                                          font=("Courier", 9), tags="perf_hud")
+        else:
+            c.itemconfigure(self._hud_item, text=text)
+            c.coords(self._hud_item, x, y)
+        c.tag_raise(self._hud_item)
+
+    def show_message(self, text, x, y):
+        """Vide la scène et n'affiche qu'un message (pas d'image de fond)."""
+        self.clear()
+        self._message_item = self._create(self.canvas.create_text, x, y, text=text, fill="white")
+
+    def set_selection(self, outline, corners=None, rotate=None):
+        """Bordure de sélection (8 coordonnées) et poignées ; outline=None masque le tout."""
+        c = self.canvas
+        if outline is None:
+            if self._overlay_visible:
+                for item in [self._selection_item, self._rotate_item] + self._corner_items:
+                    c.itemconfigure(item, state="hidden")
+                self._overlay_visible = False
+            return
+        if self._selection_item is None:
+            self._selection_item = self._create(c.create_polygon, *outline, fill="", outline="#1F6AA5",
+                                                width=1, dash=(4, 4), tags="selection_border")
+            self._corner_items = [self._create(c.create_rectangle, 0, 0, 0, 0, fill="#FF5555",
+                                               outline="#1F6AA5", width=1, tags="handle_corner")
+                                  for _ in range(4)]
+            self._rotate_item = self._create(c.create_oval, 0, 0, 0, 0, fill="#00FF00",
+                                             outline="#1F6AA5", width=2, tags="handle_rotate")
+            self._restack = True
+        else:
+            c.coords(self._selection_item, *outline)
+        s = HANDLE_SIZE
+        for item, (hx, hy) in zip(self._corner_items, corners):
+            c.coords(item, hx - s, hy - s, hx + s, hy + s)
+        r = ROTATE_HANDLE_RADIUS
+        c.coords(self._rotate_item, rotate[0] - r, rotate[1] - r, rotate[0] + r, rotate[1] + r)
+        if not self._overlay_visible:
+            for item in [self._selection_item, self._rotate_item] + self._corner_items:
+                c.itemconfigure(item, state="normal")
+            self._overlay_visible = True
+
+    def finish(self):
+        """Fin de frame : rétablit l'ordre d'empilement si des items ont été créés ou réordonnés."""
+        if not self._restack:
+            return
+        c = self.canvas
+        if self._frame_item is not None:
+            c.tag_lower(self._frame_item)
+        for item in ([self._sprite_item, self._overlay_item, self._selection_item] + self._corner_items
+                     + [self._rotate_item, self._hud_item]):
+            if item is not None:
+                c.tag_raise(item)
+        self._restack = False
+
+    def item_count(self):
+        return len(self.canvas.find_all())
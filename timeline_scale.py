@@ -0,0 +1,89 @@
+"""
+timeline_scale.py
+Échelle (zoom) de la timeline de composition_editor.py.
+
+Un seul modèle : `pixels_per_second`. Toutes les conversions temps <-> x de la timeline
+(dessin, clics, curseur de lecture) passent par TimelineScale. La règle choisit son pas de
+graduation selon le niveau de détail : frames quand on est très zoomé, secondes, puis
+minutes pour une vue d'ensemble de plusieurs heures ; le nombre de graduations dessinées
+reste ainsi à peu près constant quel que soit le zoom.
+"""
+
+MIN_SECONDS = 7200.0            # durée minimale couverte par la zone de défilement
+DEFAULT_PPS = 300000 / 7200.0   # échelle historique : 300000 px pour 2 h
+MAX_PPS = 2000.0                # zoom maximal (pixels par seconde)
+ABS_MIN_PPS = 0.01              # zoom minimal absolu (le zoom minimal réel est « tout afficher »)
+WHEEL_STEP = 1.25               # facteur de zoom par cran de molette (Ctrl)
+MIN_TICK_PX = 24                # écart minimal entre deux graduations
+MIN_LABEL_PX = 100              # écart minimal entre deux graduations étiquetées
+
+# pas de graduation en secondes (hors pas en frames, ajoutés selon la cadence)
+_SECOND_STEPS = (0.5, 1, 2, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800, 3600)
+
+
+class TimelineScale:
+    def __init__(self, frame_rate=25, pixels_per_second=DEFAULT_PPS):
+        self.frame_rate = frame_rate
+        self.pixels_per_second = pixels_per_second
+        frame = 1.0 / frame_rate
+        self._steps = tuple(k * frame for k in (1, 2, 5)) + _SECOND_STEPS
+
+    def time_to_x(self, t):
+        return t * self.pixels_per_second
+
+    def x_to_time(self, x):
+        return x / self.pixels_per_second
+
+    def extent(self, duration):
+        """Largeur en pixels de la zone de défilement pour un contenu de `duration` secondes."""
+        return max(MIN_SECONDS, duration) * self.pixels_per_second
+
+    def set_zoom(self, pixels_per_second, min_pps=ABS_MIN_PPS):
+        self.pixels_per_second = min(max(pixels_per_second, min_pps, ABS_MIN_PPS), MAX_PPS)
+        return self.pixels_per_second
+
+    def fit(self, t0, t1, width, padding=0.05):
+        """Échelle montrant l'intervalle [t0, t1] sur `width` pixels (avec une marge relative)."""
+        span = max(t1 - t0, 1.0 / self.frame_rate)
+        return self.set_zoom(width / (span * (1 + 2 * padding)))
+
+    # -------------------------
+    # Règle (niveau de détail)
+    # -------------------------
+    def tick_steps(self):
+        """(pas des graduations, pas des étiquettes) en secondes pour le zoom courant."""
+        pps = self.pixels_per_second
+        minor = next((s for s in self._steps if s * pps >= MIN_TICK_PX), self._steps[-1])
+        major = next((s for s in self._steps
+                      if s * pps >= MIN_LABEL_PX and s >= minor and _is_multiple(s, minor)),
+                     None)
+        if major is None:
+            # au-delà de la dernière valeur : multiple entier du pas des graduations
+            n = max(1, int(-(-MIN_LABEL_PX // (minor * pps))))
+            major = minor * n
+        return minor, major
+
+    def ticks(self, t0, t1):
+        """Graduations (temps, étiquetée ?) comprises dans [t0, t1]."""
+        minor, major = self.tick_steps()
+        ratio = int(round(major / minor))
+        k0 = max(0, int(t0 // minor))
+        k1 = int(t1 // minor) + 1
+        return [(k * minor, k % ratio == 0) for k in range(k0, k1)]
+
+    def label(self, t, major):
+        """Étiquette de la règle : frames, secondes ou minutes selon le pas des étiquettes."""
+        total_frames = int(round(t * self.frame_rate))
+        seconds, frame = divmod(total_frames, self.frame_rate)
+        h, rem = divmod(int(seconds), 3600)
+        m, s = divmod(rem, 60)
+        if major < 1:
+            return f"{h * 60 + m:02d}:{s:02d}:{frame:02d}"
+        if major < 60:
+            return f"{h:02d}:{m:02d}:{s:02d}"
+        return f"{h:02d}:{m:02d}"
+
+
+def _is_multiple(a, b):
+    r = a / b
+    return abs(r - round(r)) < 1e-6
@@ -0,0 +1,90 @@
+"""
+timeline_scene.py
+Items recyclés du canvas de la timeline de composition_editor.py.
+
+La timeline ne dessine plus que la fenêtre de temps visible (plus une marge) : à chaque
+redraw, les items sont repris dans des « pools » par catégorie (pistes, graduations,
+keyframes...) et simplement déplacés par `coords()` ; `itemconfigure()` n'est appelé que si
+les options changent, et les items en trop sont masqués au lieu d'être supprimés. Le coût
+d'un redraw suit donc ce qui est visible, pas la durée totale de la timeline.
+"""
+
+# ordre d'empilement des pools, du dessous vers le dessus
+POOLS = (
+    ('track', 'rectangle'),
+    ('waveform', 'polygon'),
+    ('tick', 'line'),
+    ('tick_label', 'text'),
+    ('track_label', 'text'),
+    ('scene_marker', 'polygon'),
+    ('keyframe', 'oval'),
+)
+
+
+class _Pool:
+    __slots__ = ('tag', 'kind', 'items', 'options', 'used', 'visible')
+
+    def __init__(self, tag, kind):
+        self.tag = tag
+        self.kind = kind
+        self.items = []
+        self.options = []   # dernières options appliquées à chaque item
+        self.used = 0       # items utilisés par le redraw en cours
+        self.visible = 0    # items visibles (les suivants sont masqués)
+
+
+class TimelineScene:
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self._pools = {tag: _Pool(tag, kind) for tag, kind in POOLS}
+        self._restack = False
+        # compteurs (items créés / reconfigurés depuis le début)
+        self.created = 0
+        self.configured = 0
+
+    def begin(self):
+        for pool in self._pools.values():
+            pool.used = 0
+
+    def draw(self, tag, coords, **options):
+        """Place le prochain item du pool `tag` (créé au besoin) ; renvoie son id."""
+        pool = self._pools[tag]
+        c = self.canvas
+        i = pool.used
+        pool.used += 1
+        if i < len(pool.items):
+            item = pool.items[i]
+            c.coords(item, *coords)
+            if i >= pool.visible:
+                options['state'] = 'normal'
+            if options != pool.options[i]:
+                c.itemconfigure(item, **options)
+                self.configured += 1
+                options.pop('state', None)
+                pool.options[i] = options
+            return item
+        item = getattr(c, 'create_' + pool.kind)(*coords, tags=pool.tag, **options)
+        self.created += 1
+        pool.items.append(item)
+        pool.options.append(options)
+        pool.visible = len(pool.items)
+        self._restack = True
+        return item
+
+    def end(self):
+        """Masque les items non réutilisés et rétablit l'ordre d'empilement si besoin."""
+        c = self.canvas
+        for pool in self._pools.values():
+            for item in pool.items[pool.used:pool.visible]:
+                c.itemconfigure(item, state='hidden')
+            pool.visible = pool.used
+        if self._restack:
+            for tag, _ in POOLS:
+                c.tag_raise(tag)
+            # le curseur de lecture et le rectangle de sélection restent au-dessus de tout
+            c.tag_raise('playback_cursor')
+            c.tag_raise('marquee')
+            self._restack = False
+
+    def item_count(self):
+        return sum(len(pool.items) for pool in self._pools.values())
@@ -0,0 +1,58 @@
+"""
+viewport.py
+Transformation de vue (zoom / pan) de la vue de rendu de composition_editor.py.
+
+zoom = 1 correspond à l'image de fond entièrement visible (ajustée au canvas) ; le pan
+décale l'image par rapport à cette position centrée. Toutes les coordonnées du canvas
+(rendu, clics, poignées) passent par Viewport.geometry().
+"""
+
+MIN_ZOOM = 0.25
+MAX_ZOOM = 32.0
+WHEEL_STEP = 1.2  # facteur de zoom par cran de molette
+
+
+class Viewport:
+    def __init__(self):
+        self.zoom = 1.0
+        self.pan_x = 0.0
+        self.pan_y = 0.0
+
+    def reset(self):
+        """Revient à l'image entière, centrée."""
+        self.zoom = 1.0
+        self.pan_x = 0.0
+        self.pan_y = 0.0
+
+    def geometry(self, cw, ch, bw, bh):
+        """(offset_x, offset_y, draw_w, draw_h, scale) de l'image de fond dans un canvas cw x ch."""
+        scale = min(cw / bw, ch / bh) * self.zoom
+        draw_w = max(1, int(bw * scale))
+        draw_h = max(1, int(bh * scale))
+        offset_x = int((cw - draw_w) / 2 + self.pan_x)
+        offset_y = int((ch - draw_h) / 2 + self.pan_y)
+        return offset_x, offset_y, draw_w, draw_h, scale
+
+    def zoom_at(self, factor, x, y, cw, ch, bw, bh):
+        """Multiplie le zoom par `factor` en gardant fixe le point du canvas (x, y)."""
+        bx, by, draw_w, draw_h, _ = self.geometry(cw, ch, bw, bh)
+        u = (x - bx) / draw_w
+        v = (y - by) / draw_h
+        self.zoom = min(max(self.zoom * factor, MIN_ZOOM), MAX_ZOOM)
+        _, _, new_w, new_h, _ = self.geometry(cw, ch, bw, bh)
+        self.pan_x = x - u * new_w - (cw - new_w) / 2
+        self.pan_y = y - v * new_h - (ch - new_h) / 2
+
+    def pan_by(self, dx, dy):
+        """Décale la vue de (dx, dy) pixels du canvas (glisser avec espace enfoncé)."""
+        self.pan_x += dx
+        self.pan_y += dy
+
+    @staticmethod
+    def visible_rect(cw, ch, bx, by, draw_w, draw_h):
+        """Partie visible de l'image dans le canvas (x0, y0, x1, y1), ou None si elle est hors champ."""
+        x0, y0 = max(bx, 0), max(by, 0)
+        x1, y1 = min(bx + draw_w, cw), min(by + draw_h, ch)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        return x0, y0, x1, y1
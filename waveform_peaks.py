@@ -0,0 +1,154 @@
+"""
+waveform_peaks.py
+Pyramide de pics (min / max) de la bande son, pour la piste audio de la timeline.
+
+Calculée une seule fois au chargement du son (même décimation min / max que le prototype
+test8.py) : le niveau 0 garde le min et le max de chaque bloc de BASE_BLOCK échantillons,
+chaque niveau suivant fusionne les blocs deux à deux (puissances de deux). Au dessin, on
+prend le niveau dont les blocs font au plus un pixel au zoom courant et on n'en lit que la
+tranche visible : l'enveloppe reste exacte à tout zoom, sans repasser sur les échantillons.
+
+La pyramide est aussi enregistrée à côté du fichier son (<son>.peaks.npy pour les pics,
+<son>.peaks.json pour la clé et les métadonnées). La clé est la taille, la date de
+modification et une empreinte du contenu du fichier ; à la réouverture d'un son inchangé,
+les pics sont relus en mémoire mappée (np.load(mmap_mode='r')) sans décoder l'audio.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+BASE_BLOCK = 64        # échantillons par bloc au niveau 0
+MIN_LEVEL_BLOCKS = 16  # on arrête la pyramide quand un niveau a moins de blocs
+CACHE_VERSION = 1
+HASH_CHUNK = 1 << 20   # l'empreinte porte sur le premier et le dernier Mo du fichier
+
+
+def _minmax_pairs(mins, maxs):
+    """Niveau suivant : fusionne les blocs deux à deux (le dernier est dupliqué si impair)."""
+    if len(mins) % 2:
+        mins = np.append(mins, mins[-1])
+        maxs = np.append(maxs, maxs[-1])
+    return mins.reshape(-1, 2).min(axis=1), maxs.reshape(-1, 2).max(axis=1)
+
+
+class PeakPyramid:
+    def __init__(self, levels, sample_rate, base_block=BASE_BLOCK):
+        # levels : liste de (mins, maxs) float32, niveau k = blocs de base_block * 2**k échantillons
+        self.levels = levels
+        self.sample_rate = float(sample_rate)
+        self.base_block = base_block
+
+    @classmethod
+    def from_samples(cls, samples, sample_rate, base_block=BASE_BLOCK):
+        samples = np.asarray(samples, dtype=np.float32).ravel()
+        if samples.size == 0:
+            return cls([], sample_rate, base_block)
+        n = -(-samples.size // base_block)
+        pad = n * base_block - samples.size
+        if pad:
+            samples = np.concatenate((samples, np.full(pad, samples[-1], dtype=np.float32)))
+        blocks = samples.reshape(n, base_block)
+        levels = [(blocks.min(axis=1), blocks.max(axis=1))]
+        while len(levels[-1][0]) >= 2 * MIN_LEVEL_BLOCKS:
+            levels.append(_minmax_pairs(*levels[-1]))
+        return cls(levels, sample_rate, base_block)
+
+    def __len__(self):
+        return len(self.levels)
+
+    def block_seconds(self, level):
+        return self.base_block * (1 << level) / self.sample_rate
+
+    def level_for(self, pixels_per_second):
+        """Niveau le plus grossier dont un bloc ne dépasse pas un pixel."""
+        level = 0
+        while level + 1 < len(self.levels) and self.block_seconds(level + 1) * pixels_per_second <= 1.0:
+            level += 1
+        return level
+
+    def window(self, t0, t1, pixels_per_second):
+        """(temps des centres de blocs, mins, maxs) couvrant [t0, t1] au zoom donné."""
+        if not self.levels:
+            empty = np.empty(0, dtype=np.float32)
+            return empty, empty, empty
+        level = self.level_for(pixels_per_second)
+        mins, maxs = self.levels[level]
+        block = self.block_seconds(level)
+        i0 = max(0, int(t0 / block))
+        i1 = min(len(mins), int(t1 / block) + 2)
+        if i0 >= i1:
+            empty = np.empty(0, dtype=np.float32)
+            return empty, empty, empty
+        times = (np.arange(i0, i1) + 0.5) * block
+        return times, mins[i0:i1], maxs[i0:i1]
+
+
+# -------------------------
+# Cache sur disque
+# -------------------------
+def cache_paths(audio_path):
+    return audio_path + '.peaks.npy', audio_path + '.peaks.json'
+
+
+def file_key(audio_path):
+    """Clé du fichier son : taille, date de modification (ns) et empreinte du contenu."""
+    st = os.stat(audio_path)
+    h = hashlib.blake2b(digest_size=16)
+    with open(audio_path, 'rb') as f:
+        h.update(f.read(HASH_CHUNK))
+        if st.st_size > HASH_CHUNK:
+            f.seek(max(HASH_CHUNK, st.st_size - HASH_CHUNK))
+            h.update(f.read(HASH_CHUNK))
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'hash': h.hexdigest()}
+
+
+def save_peak_cache(audio_path, pyramid, duration):
+    """Écrit la pyramide à côté du fichier son (les métadonnées en dernier : elles valident le cache)."""
+    npy_path, meta_path = cache_paths(audio_path)
+    data = np.stack((np.concatenate([mins for mins, _ in pyramid.levels]),
+                     np.concatenate([maxs for _, maxs in pyramid.levels]))).astype(np.float32)
+    meta = {
+        'version': CACHE_VERSION,
+        'key': file_key(audio_path),
+        'sample_rate': pyramid.sample_rate,
+        'base_block': pyramid.base_block,
+        'duration': float(duration),
+        'lengths': [len(mins) for mins, _ in pyramid.levels],
+    }
+    with open(npy_path + '.tmp', 'wb') as f:
+        np.save(f, data)
+    os.replace(npy_path + '.tmp', npy_path)
+    with open(meta_path + '.tmp', 'w') as f:
+        json.dump(meta, f)
+    os.replace(meta_path + '.tmp', meta_path)
+
+
+def load_peak_cache(audio_path):
+    """(PeakPyramid mappée en mémoire, durée) si le cache correspond au fichier, sinon None."""
+    npy_path, meta_path = cache_paths(audio_path)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get('version') != CACHE_VERSION:
+            return None
+        key = meta['key']
+        st = os.stat(audio_path)
+        # taille et date d'abord (gratuit), empreinte ensuite
+        if key['size'] != st.st_size or key['mtime_ns'] != st.st_mtime_ns or key != file_key(audio_path):
+            return None
+        data = np.load(npy_path, mmap_mode='r')
+        lengths = meta['lengths']
+        if data.shape != (2, sum(lengths)):
+            return None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    levels = []
+    offset = 0
+    for n in lengths:
+        levels.append((data[0, offset:offset + n], data[1, offset:offset + n]))
+        offset += n
+    return PeakPyramid(levels, meta['sample_rate'], meta['base_block']), meta['duration']